@@ -8,7 +8,7 @@ import sys
 import time
 import pymysql
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text, event
+from sqlalchemy import create_engine, insert, text, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -158,23 +158,21 @@ def insert_sample_data():
              'target_words': json.dumps(['fine', 'thank', 'you'])},
         ]
         
-        # Insert picture exercises
-        for pic_data in picture_exercises:
-            existing = db.query(PictureExercise).filter(
-                PictureExercise.picture_id == pic_data['picture_id']
-            ).first()
-            if not existing:
-                pic = PictureExercise(**pic_data)
-                db.add(pic)
+        # Insert picture exercises not already present (one lookup, one executemany)
+        existing = {row[0] for row in db.query(PictureExercise.picture_id).filter(
+            PictureExercise.picture_id.in_([p['picture_id'] for p in picture_exercises])
+        )}
+        new_pictures = [p for p in picture_exercises if p['picture_id'] not in existing]
+        if new_pictures:
+            db.execute(insert(PictureExercise.__table__), new_pictures)
         
-        # Insert sentence exercises
-        for sent_data in sentence_exercises:
-            existing = db.query(SentenceExercise).filter(
-                SentenceExercise.sentence_id == sent_data['sentence_id']
-            ).first()
-            if not existing:
-                sent = SentenceExercise(**sent_data)
-                db.add(sent)
+        # Insert sentence exercises not already present
+        existing = {row[0] for row in db.query(SentenceExercise.sentence_id).filter(
+            SentenceExercise.sentence_id.in_([s['sentence_id'] for s in sentence_exercises])
+        )}
+        new_sentences = [s for s in sentence_exercises if s['sentence_id'] not in existing]
+        if new_sentences:
+            db.execute(insert(SentenceExercise.__table__), new_sentences)
         
         db.commit()
         db.close()
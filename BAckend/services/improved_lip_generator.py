@@ -44,6 +44,9 @@ class ImprovedLipGenerator:
         self.fps = fps
         self.mapper = get_phoneme_viseme_mapper()
         
+        # Static face drawn once; each frame only adds the mouth and labels
+        self._face_base = self._build_face_base()
+        
         # Create mouth shapes directory (in api/media folder)
         api_dir = Path(__file__).parent.parent / 'api'
         self.mouth_dir = api_dir / 'media' / 'mouth_shapes'
@@ -270,9 +273,8 @@ class ImprovedLipGenerator:
         print(f"✅ Generated lip animation: {output_path}")
         return output_path
     
-    def _create_frame_with_mouth(self, mouth_img: np.ndarray, 
-                                 phoneme: str, description: str) -> np.ndarray:
-        """Create a complete frame with face, mouth, and labels"""
+    def _build_face_base(self) -> np.ndarray:
+        """Render the face features, which are the same in every frame"""
         
         # Create white background
         frame = np.ones((self.height, self.width, 3), dtype=np.uint8) * 255
@@ -308,6 +310,16 @@ class ImprovedLipGenerator:
         ], np.int32)
         cv2.polylines(frame, [nose_pts], False, (180, 140, 120), 2)
         
+        return frame
+    
+    def _create_frame_with_mouth(self, mouth_img: np.ndarray, 
+                                 phoneme: str, description: str) -> np.ndarray:
+        """Create a complete frame with face, mouth, and labels"""
+        
+        # Start from the static face (background, face, eyes, eyebrows, nose)
+        frame = self._face_base.copy()
+        face_center = (self.width // 2, self.height // 2)
+        
         # Place mouth image
         mouth_h, mouth_w = mouth_img.shape[:2]
         mouth_y = face_center[1] + 40
@@ -9,13 +9,16 @@ import numpy as np
 from typing import List, Dict, Tuple, Optional
 import os
 from pathlib import Path
-from PIL import Image
+from PIL import Image, ImageDraw, ImageFont
 from .phoneme_viseme_mapper import get_phoneme_viseme_mapper
 
 
 class LipAnimationGenerator:
     """Generates lip animation videos from viseme sequences"""
     
+    # Frame background; sprites are flattened onto it once
+    BACKGROUND_COLOR = (240, 240, 250)
+    
     # Mapping from viseme codes to Rhubarb mouth shapes
     VISEME_TO_RHUBARB = {
         'silence': 'A',
@@ -150,6 +153,15 @@ class LipAnimationGenerator:
         # Load sprite images
         self.sprites_dir = self._find_sprites_dir(sprites_dir)
         self.sprites = self._load_sprites()
+        self._flat_sprites = {}
+        
+        # Label fonts are parsed once, not per frame
+        try:
+            self._font_large = ImageFont.truetype("arial.ttf", 36)
+            self._font_small = ImageFont.truetype("arial.ttf", 20)
+        except:
+            self._font_large = ImageFont.load_default()
+            self._font_small = ImageFont.load_default()
         
         if self.sprites:
             print(f"✅ Loaded {len(self.sprites)} mouth shape sprites for video generation")
@@ -205,6 +217,36 @@ class LipAnimationGenerator:
         
         return sprites
     
+    def _get_flat_sprite(self, shape: str):
+        """
+        Sprite resized to 60% of the frame width and composited onto the background
+        
+        Args:
+            shape: Rhubarb mouth shape
+            
+        Returns:
+            (RGB sprite image, top-left position), cached per shape
+        """
+        if shape not in self._flat_sprites:
+            sprite = self.sprites[shape]
+            
+            # Resize sprite to fit nicely (60% of width)
+            sprite_width = int(self.width * 0.6)
+            sprite_height = int(sprite.height * (sprite_width / sprite.width))
+            # Bilinear is fast and fine unless shrinking by more than 2x
+            resample = Image.Resampling.LANCZOS if sprite.width > 2 * sprite_width else Image.Resampling.BILINEAR
+            sprite_resized = sprite.resize((sprite_width, sprite_height), resample)
+            
+            sprite_flat = Image.new('RGB', sprite_resized.size, color=self.BACKGROUND_COLOR)
+            sprite_flat.paste(sprite_resized, (0, 0), sprite_resized)
+            
+            # Center sprite
+            x = (self.width - sprite_width) // 2
+            y = (self.height - sprite_height) // 2
+            
+            self._flat_sprites[shape] = (sprite_flat, (x, y))
+        return self._flat_sprites[shape]
+    
     def draw_face_base(self, frame: np.ndarray) -> np.ndarray:
         """Draw base face structure"""
         # Face oval (skin tone)
@@ -250,19 +292,9 @@ class LipAnimationGenerator:
         
         if self.sprites and rhubarb_shape in self.sprites:
             # Use sprite image
-            sprite = self.sprites[rhubarb_shape]
-            
-            # Resize sprite to fit nicely (60% of width)
-            sprite_width = int(self.width * 0.6)
-            sprite_height = int(sprite.height * (sprite_width / sprite.width))
-            sprite_resized = sprite.resize((sprite_width, sprite_height), Image.Resampling.LANCZOS)
-            
-            # Center sprite
-            x = (self.width - sprite_width) // 2
-            y = (self.height - sprite_height) // 2
-            
-            # Paste sprite (with alpha channel)
-            pil_image.paste(sprite_resized, (x, y), sprite_resized)
+            # Opaque sprite pre-flattened onto the background, so no alpha blend per frame
+            sprite_flat, (x, y) = self._get_flat_sprite(rhubarb_shape)
+            pil_image.paste(sprite_flat, (x, y))
         else:
             # Fallback to drawn graphics
             cv_frame = np.array(pil_image)
@@ -271,29 +303,18 @@ class LipAnimationGenerator:
             pil_image = Image.fromarray(cv_frame)
         
         # Add text labels
-        from PIL import ImageDraw, ImageFont
         draw = ImageDraw.Draw(pil_image)
-        
-        try:
-            font_large = ImageFont.truetype("arial.ttf", 36)
-            font_small = ImageFont.truetype("arial.ttf", 20)
-        except:
-            font_large = ImageFont.load_default()
-            font_small = ImageFont.load_default()
+        font_large, font_small = self._font_large, self._font_small
         
         # Word at top
         if word:
             word_text = f'"{word.upper()}"'
-            bbox = draw.textbbox((0, 0), word_text, font=font_large)
-            text_width = bbox[2] - bbox[0]
-            draw.text((self.width//2 - text_width//2, 30), word_text, fill=(50, 50, 50), font=font_large)
+            draw.text((self.width//2, 30), word_text, fill=(50, 50, 50), font=font_large, anchor='ma')
         
         # Phoneme/viseme info at bottom
         if phoneme:
             label = f"Phoneme: {phoneme} | Viseme: {viseme} | Shape: {rhubarb_shape}"
-            bbox = draw.textbbox((0, 0), label, font=font_small)
-            text_width = bbox[2] - bbox[0]
-            draw.text((self.width//2 - text_width//2, self.height - 50), label, fill=(100, 100, 100), font=font_small)
+            draw.text((self.width//2, self.height - 50), label, fill=(100, 100, 100), font=font_small, anchor='ma')
         
         return pil_image
     
@@ -384,7 +405,7 @@ class LipAnimationGenerator:
         
         # Add silence at start (longer for slower pace)
         for _ in range(int(self.fps * 0.5)):  # 500ms silence
-            pil_frame = Image.new('RGB', (self.width, self.height), color=(240, 240, 250))
+            pil_frame = Image.new('RGB', (self.width, self.height), color=self.BACKGROUND_COLOR)
             pil_frame = self.draw_mouth_sprite(pil_frame, 'silence', word=word)
             frames.append(pil_frame)
         
@@ -402,7 +423,7 @@ class LipAnimationGenerator:
             next_viseme = visemes[i + 1]['viseme'] if i + 1 < len(visemes) else 'silence'
             
             for frame_idx in range(num_frames):
-                pil_frame = Image.new('RGB', (self.width, self.height), color=(240, 240, 250))
+                pil_frame = Image.new('RGB', (self.width, self.height), color=self.BACKGROUND_COLOR)
                 
                 # Add smooth transition in last 30% of frames
                 transition_start = int(num_frames * 0.7)
@@ -418,7 +439,7 @@ class LipAnimationGenerator:
         
         # Add silence at end (longer for slower pace)
         for _ in range(int(self.fps * 0.7)):  # 700ms silence
-            pil_frame = Image.new('RGB', (self.width, self.height), color=(240, 240, 250))
+            pil_frame = Image.new('RGB', (self.width, self.height), color=self.BACKGROUND_COLOR)
             pil_frame = self.draw_mouth_sprite(pil_frame, 'silence', word=word)
             frames.append(pil_frame)
         
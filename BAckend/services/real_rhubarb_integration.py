@@ -6,12 +6,26 @@ https://github.com/DanielSWolf/rhubarb-lip-sync
 
 import subprocess
 import json
+import logging
+import math
 import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Iterator
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
+
+class _ShapeTable(dict):
+    """Translation table that maps characters without an entry to the rest shape"""
+    
+    def __missing__(self, key):
+        return 'A'
+
 
 class RealRhubarbLipSync:
     """
@@ -47,6 +61,40 @@ class RealRhubarbLipSync:
         self.height = height
         self.fps = fps
         
+        # Gradient background (blue to white), built once and reused by every frame
+        color_vals = (200 + (np.arange(self.height) / self.height) * 55).astype(np.int16)
+        gradient_row = np.stack([color_vals - 50, color_vals - 30, color_vals], axis=1).astype(np.uint8)
+        self._background = np.broadcast_to(gradient_row[:, None, :], (self.height, self.width, 3)).copy()
+        
+        # Static avatar layers (everything except the mouth), rendered on first use.
+        # The drawn avatar (hair, eyes, lashes, brows, nose) is shared by every
+        # instance of the same size, since callers such as RhubarbWithSprites
+        # create a fresh instance per frame.
+        self._avatar_cache = self._SHARED_AVATAR_LAYERS.get((self.width, self.height))
+        self._face_cache = None
+        
+        # Fonts are parsed once and reused by every frame
+        self._load_fonts()
+        self._word_text_x = {}
+        
+        # Frames built from mouth images are composited in place into one reused buffer
+        self._frame_buf = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        # Only this bottom band (the Rhubarb info bar) changes from frame to frame
+        self._label_band_top = max(self.height - 60, 0)
+        self._titled_face_cache = None
+        
+        # Everything but the time label depends only on the mouth shape (and word),
+        # so each shape's frame is rendered once and reused
+        self._shape_frame_cache = None
+        # Shape frames for the fixed words are kept across animations
+        self._prebaked_shape_frames = {}
+        self._avatar_mouth_cache = self._SHARED_AVATAR_MOUTHS.setdefault((self.width, self.height), {})
+        
+        # Mouth images are pasted at a fixed spot in the lower part of the face
+        self._mouth_pos = (self.width // 2 - self.MOUTH_SIZE[0] // 2, self.height // 2 - 30 + 50)
+        # Mouth image tiles depend only on the frame size, so instances share them
+        self._mouth_images = self._SHARED_MOUTH_IMAGES.get((self.width, self.height))
+        
         # Check if Rhubarb is available
         self.rhubarb_available = self.rhubarb_path is not None
         
@@ -54,8 +102,21 @@ class RealRhubarbLipSync:
             print(f"⚠️ Rhubarb Lip Sync not found. Will use fallback timing.")
             print(f"   Install from: https://github.com/DanielSWolf/rhubarb-lip-sync/releases")
     
+    # Rhubarb paths already probed in this process: path -> version string (None if unusable)
+    _RHUBARB_VERSIONS = {}
+    
     def _check_rhubarb_path(self, path: str) -> bool:
         """Check if Rhubarb is accessible at given path"""
+        # Cheap check first: an executable file at the path (or on PATH for bare names)
+        if shutil.which(path) is None:
+            return False
+        # Only run `--version` once per path per process
+        if path not in self._RHUBARB_VERSIONS:
+            self._RHUBARB_VERSIONS[path] = self._probe_rhubarb_version(path)
+        return self._RHUBARB_VERSIONS[path] is not None
+    
+    def _probe_rhubarb_version(self, path: str) -> Optional[str]:
+        """Run `rhubarb --version`, returning the version string or None on failure"""
         try:
             result = subprocess.run(
                 [path, "--version"],
@@ -66,12 +127,12 @@ class RealRhubarbLipSync:
             if result.returncode == 0:
                 print(f"✅ Rhubarb Lip Sync found: {result.stdout.strip()}")
                 print(f"   Path: {path}")
-                return True
-            return False
+                return result.stdout.strip()
+            return None
         except (FileNotFoundError, OSError):
-            return False
+            return None
         except Exception:
-            return False
+            return None
     
     def generate_lip_sync_data(self, audio_path: str, output_json: str = None, dialog: str = None) -> Dict:
         """
@@ -79,7 +140,7 @@ class RealRhubarbLipSync:
         
         Args:
             audio_path: Path to audio file
-            output_json: Path to save JSON output (optional)
+            output_json: Path to also save the JSON output to (optional)
             dialog: Text transcript to improve accuracy (optional)
             
         Returns:
@@ -91,24 +152,20 @@ class RealRhubarbLipSync:
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
-        # Create temp output if not specified
-        if output_json is None:
-            output_json = audio_path.replace(Path(audio_path).suffix, "_rhubarb.json")
-        
         print(f"\n{'='*70}")
         print(f"🎬 RUNNING RHUBARB LIP SYNC")
         print(f"{'='*70}")
         print(f"Audio: {audio_path}")
-        print(f"Output: {output_json}")
+        if output_json:
+            print(f"Output: {output_json}")
         if dialog:
             print(f"Dialog: {dialog}")
         
-        # Build Rhubarb command
+        # Build Rhubarb command (no -o: the JSON is read straight from stdout)
         cmd = [
             self.rhubarb_path,
             "-f", "json",  # JSON format
-            audio_path,
-            "-o", output_json
+            audio_path
         ]
         
         # Add dialog text if provided (improves accuracy)
@@ -139,9 +196,12 @@ class RealRhubarbLipSync:
             
             print(f"✅ Rhubarb analysis complete")
             
-            # Load and return JSON data
-            with open(output_json, 'r') as f:
-                data = json.load(f)
+            # Parse JSON data from stdout
+            data = json.loads(result.stdout)
+            
+            if output_json:
+                with open(output_json, 'w') as f:
+                    json.dump(data, f, indent=2)
             
             print(f"Duration: {data['metadata']['duration']:.2f}s")
             print(f"Mouth cues: {len(data['mouthCues'])}")
@@ -156,6 +216,28 @@ class RealRhubarbLipSync:
             print(f"❌ Rhubarb error: {e}")
             raise
     
+    def generate_lip_sync_data_batch(self, audio_paths: List[str], dialogs: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Run Rhubarb on several audio files in parallel
+        
+        Rhubarb is single-threaded, so one process per file scales with cores.
+        
+        Args:
+            audio_paths: Paths to audio files
+            dialogs: Text transcripts matching audio_paths (optional)
+            
+        Returns:
+            Mouth cue timing data for each audio file, in the same order
+        """
+        if dialogs is None:
+            dialogs = [None] * len(audio_paths)
+        
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            return list(executor.map(
+                lambda args: self.generate_lip_sync_data(args[0], dialog=args[1]),
+                zip(audio_paths, dialogs)
+            ))
+    
     def generate_animation(self, audio_path: str, word: str, output_path: str, language: str = "en") -> str:
         """
         Generate complete lip sync animation video using Rhubarb
@@ -184,51 +266,120 @@ class RealRhubarbLipSync:
             # Fallback: create simple timing data
             lip_sync_data = self._create_fallback_timing(word)
         
-        # Step 2: Generate video frames from timing data
+        # Step 2: Generate video frames from timing data (lazily, one at a time;
+        # a frame may be a reused buffer that is only valid until the next one)
         frames = self._generate_frames_from_rhubarb(lip_sync_data, word)
         
-        print(f"Generated {len(frames)} frames ({len(frames)/self.fps:.2f}s)")
+        # Step 3: Encode video, streaming frames straight into ffmpeg
+        ffmpeg_path = self._find_ffmpeg()
+        total_frames = int(lip_sync_data['metadata']['duration'] * self.fps)
+        has_audio = bool(audio_path) and os.path.exists(audio_path)
+        if not has_audio:
+            print(f"⚠️ Could not add audio: {audio_path} not found")
         
-        # Step 3: Encode video with moviepy
-        try:
-            import moviepy
-            from moviepy.video.io.ImageSequenceClip import ImageSequenceClip
-            from moviepy.audio.io.AudioFileClip import AudioFileClip
-            
-            # Convert PIL images to numpy arrays
-            frame_arrays = [np.array(frame) for frame in frames]
-            
-            # Create video clip
-            clip = ImageSequenceClip(frame_arrays, fps=self.fps)
-            
-            # Add audio
+        print(f"\n📹 Encoding video (streaming frames to ffmpeg)...")
+        if has_audio:
             try:
-                audio_clip = AudioFileClip(audio_path)
-                clip = clip.set_audio(audio_clip)
+                frame_count = self._encode_with_ffmpeg(ffmpeg_path, frames, total_frames, audio_path, output_path)
                 print(f"✅ Audio track added")
-            except Exception as e:
+            except RuntimeError as e:
                 print(f"⚠️ Could not add audio: {e}")
-            
-            # Write video
-            print(f"\n📹 Encoding video...")
-            clip.write_videofile(
-                output_path,
-                codec='libx264',
-                audio_codec='aac',
-                preset='ultrafast',
-                ffmpeg_params=['-pix_fmt', 'yuv420p'],
-                logger=None
+                print(f"   Video will be generated without audio track")
+                has_audio = False
+                # The failed run consumed the frame generator; start a fresh one
+                frames = self._generate_frames_from_rhubarb(lip_sync_data, word)
+        if not has_audio:
+            frame_count = self._encode_with_ffmpeg(ffmpeg_path, frames, total_frames, None, output_path)
+        print(f"Generated {frame_count} frames ({frame_count/self.fps:.2f}s)")
+        
+        print(f"\n✅ Video saved: {output_path}")
+        print(f"✅ Codec: H.264 (browser-compatible)")
+        print(f"✅ Rhubarb Lip Sync: Professional timing")
+        print(f"{'='*70}\n")
+        
+        return output_path
+    
+    # Audio formats that can be stream-copied into the MP4 without re-encoding
+    COPYABLE_AUDIO_EXTENSIONS = ('.m4a', '.aac', '.mp3')
+    
+    def _find_ffmpeg(self) -> str:
+        """Locate an ffmpeg binary on PATH, or the one bundled with imageio-ffmpeg"""
+        ffmpeg_path = shutil.which("ffmpeg")
+        if ffmpeg_path:
+            return ffmpeg_path
+        try:
+            import imageio_ffmpeg
+            return imageio_ffmpeg.get_ffmpeg_exe()
+        except (ImportError, RuntimeError):
+            raise RuntimeError("ffmpeg not found. Install ffmpeg or run: pip install imageio-ffmpeg")
+    
+    def _encode_with_ffmpeg(self, ffmpeg_path: str, frames: Iterable[np.ndarray], total_frames: int,
+                            audio_path: Optional[str], output_path: str) -> int:
+        """
+        Pipe raw RGB frames into ffmpeg's stdin and mux the audio in the same pass
+        
+        The audio is stream-copied when the container allows it, otherwise
+        encoded to AAC; either way it is cut to the video length.
+        
+        Returns:
+            Number of frames written
+        """
+        cmd = [
+            ffmpeg_path, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+            '-s', f'{self.width}x{self.height}', '-r', str(self.fps),
+            '-i', '-',
+        ]
+        if audio_path:
+            cmd.extend(['-i', audio_path])
+        cmd.extend(['-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p'])
+        if audio_path:
+            if Path(audio_path).suffix.lower() in self.COPYABLE_AUDIO_EXTENSIONS:
+                cmd.extend(['-c:a', 'copy'])
+            else:
+                # Pad short audio with silence so the video length decides the clip length
+                cmd.extend(['-c:a', 'aac', '-b:a', '128k', '-af', 'apad'])
+        cmd.extend(['-t', f'{total_frames / self.fps:.3f}', output_path])
+        
+        frame_count = 0
+        with tempfile.TemporaryFile() as stderr_file:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr_file,
+                bufsize=1 << 20
             )
+            try:
+                for frame in frames:
+                    # Contiguous uint8 arrays are written without an extra copy
+                    proc.stdin.write(frame)
+                    frame_count += 1
+            except BrokenPipeError:
+                pass
+            finally:
+                proc.stdin.close()
+                returncode = proc.wait()
             
-            print(f"\n✅ Video saved: {output_path}")
-            print(f"✅ Codec: H.264 (browser-compatible)")
-            print(f"✅ Rhubarb Lip Sync: Professional timing")
-            print(f"{'='*70}\n")
-            
-            return output_path
-            
-        except ImportError:
-            raise RuntimeError("moviepy not installed. Run: pip install moviepy")
+            if returncode != 0:
+                stderr_file.seek(0)
+                error = stderr_file.read().decode(errors='replace').strip()
+                print(f"❌ ffmpeg failed: {error}")
+                raise RuntimeError(f"ffmpeg failed: {error}")
+        
+        return frame_count
+    
+    # Size mouth shape images are scaled to when pasted onto the face
+    MOUTH_SIZE = (200, 200)
+    
+    # Clips with at least this many frames are rendered in a process pool
+    PARALLEL_MIN_FRAMES = 48
+    
+    # Pre-rasterized drawn avatar layers shared across instances, keyed by (width, height)
+    _SHARED_AVATAR_LAYERS = {}
+    _SHARED_AVATAR_MOUTHS = {}
+    # Mouth image tiles (blended onto the face) shared across instances, keyed by (width, height)
+    _SHARED_MOUTH_IMAGES = {}
     
     # Comprehensive phoneme to mouth shape mapping
     PHONEME_TO_MOUTH_SHAPE = {
@@ -278,40 +429,59 @@ class RealRhubarbLipSync:
         'ɔɪ': 'O',   # 'ɔɪ' (oy) starts with O shape
     }
     
-    def _generate_frames_from_rhubarb(self, lip_sync_data: Dict, word: str) -> List[Image.Image]:
-        """Generate video frames from Rhubarb timing data using actual mouth shape images"""
+    # str.translate table for the single-character phonemes (unknown ones map to 'A')
+    _PHONEME_TRANSLATION = _ShapeTable(str.maketrans(
+        {phoneme: shape for phoneme, shape in PHONEME_TO_MOUTH_SHAPE.items() if len(phoneme) == 1}
+    ))
+    
+    # Fixed mouth shape schedules for specific words: (end as a fraction of the duration, shape)
+    _FIXED_WORD_CUES = {
+        "hello": (
+            (0.15, "H"),  # h
+            (0.3, "E"),   # e
+            (0.45, "L"),  # l
+            (0.6, "L"),   # l
+            (0.8, "O"),   # o (rounded)
+            (1.0, "U"),   # u (ending)
+        ),
+        "fix": (
+            (0.3, "F"),   # f
+            (0.6, "I"),   # i
+            (1.0, "X"),   # x (using X directly)
+        ),
+    }
+    
+    def _fixed_word_cues(self, word: str, duration: float) -> List[Dict]:
+        """Scale a word's fixed mouth shape schedule to the audio duration"""
+        mouth_cues = []
+        start = 0.0
+        for end_fraction, shape in self._FIXED_WORD_CUES[word.lower()]:
+            end = duration * end_fraction
+            mouth_cues.append({"start": start, "end": end, "value": shape})
+            start = end
+        return mouth_cues
+    
+    def _phonemes_to_mouth_shapes(self, phonemes: List[str]) -> List[str]:
+        """Map phonemes to mouth shapes, in one str.translate pass when all are single characters"""
+        if all(len(phoneme) == 1 for phoneme in phonemes):
+            return list(''.join(phonemes).translate(self._PHONEME_TRANSLATION))
+        # Diphthongs such as 'oʊ' and 'aɪ' need the dict lookup
+        return [self.PHONEME_TO_MOUTH_SHAPE.get(phoneme, 'A') for phoneme in phonemes]
+    
+    def _generate_frames_from_rhubarb(self, lip_sync_data: Dict, word: str) -> Iterator[np.ndarray]:
+        """Generate video frames from Rhubarb timing data using actual mouth shape images (lazily)"""
+        
+        duration = lip_sync_data['metadata']['duration']
+        total_frames = int(duration * self.fps)
         
         # Direct mapping for specific words
-        if word.lower() == "hello":
-            # Override with fixed mouth shapes for "hello"
-            duration = lip_sync_data['metadata']['duration']
-            total_frames = int(duration * self.fps)
-            # Create custom mouth cues with fixed shapes
-            mouth_cues = [
-                {"start": 0.0, "end": duration * 0.15, "value": "H"},  # h
-                {"start": duration * 0.15, "end": duration * 0.3, "value": "E"},  # e
-                {"start": duration * 0.3, "end": duration * 0.45, "value": "L"},  # l
-                {"start": duration * 0.45, "end": duration * 0.6, "value": "L"},  # l
-                {"start": duration * 0.6, "end": duration * 0.8, "value": "O"},  # o (rounded)
-                {"start": duration * 0.8, "end": duration, "value": "U"}   # u (ending)
-            ]
-            print(f"Using exact letter-matching mouth shapes for 'hello'")
-        elif word.lower() == "fix":
-            # Override with fixed mouth shapes for "fix"
-            duration = lip_sync_data['metadata']['duration']
-            total_frames = int(duration * self.fps)
-            # Create custom mouth cues with fixed shapes
-            mouth_cues = [
-                {"start": 0.0, "end": duration * 0.3, "value": "F"},  # f
-                {"start": duration * 0.3, "end": duration * 0.6, "value": "I"},  # i
-                {"start": duration * 0.6, "end": duration, "value": "X"}   # x (using X directly)
-            ]
-            print(f"Using exact letter-matching mouth shapes for 'fix'")
+        if word.lower() in self._FIXED_WORD_CUES:
+            # Override with fixed mouth shapes for this word
+            mouth_cues = self._fixed_word_cues(word, duration)
+            logger.debug("Using exact letter-matching mouth shapes for '%s'", word)
         else:
             # Use original mouth cues for other words
             mouth_cues = lip_sync_data['mouthCues']
-            duration = lip_sync_data['metadata']['duration']
-            total_frames = int(duration * self.fps)
         
         # Get phoneme sequence for the word
         try:
@@ -326,13 +496,13 @@ class RealRhubarbLipSync:
                 total_duration = duration
                 time_per_phoneme = total_duration / len(phonemes)
                 
-                for i, phoneme in enumerate(phonemes):
+                # Get appropriate mouth shape for each phoneme
+                mouth_shapes = self._phonemes_to_mouth_shapes(phonemes)
+                
+                for i, mouth_shape in enumerate(mouth_shapes):
                     start_time = i * time_per_phoneme
                     end_time = (i + 1) * time_per_phoneme
                     
-                    # Get appropriate mouth shape for this phoneme
-                    mouth_shape = self.PHONEME_TO_MOUTH_SHAPE.get(phoneme, 'A')
-                    
                     custom_cues.append({
                         "start": start_time,
                         "end": end_time,
@@ -341,13 +511,31 @@ class RealRhubarbLipSync:
                 
                 # Use our custom cues instead of Rhubarb's
                 mouth_cues = custom_cues
-                print(f"Using custom phoneme mapping for '{word}': {[cue['value'] for cue in custom_cues]}")
-                print(f"From phonemes: {phonemes}")
+                logger.debug("Using custom phoneme mapping for '%s': %s from phonemes %s",
+                             word, mouth_shapes, phonemes)
         except Exception as e:
-            print(f"Could not create custom phoneme mapping: {e}")
+            logger.warning("Could not create custom phoneme mapping: %s", e)
             # Continue with original mouth cues
         
-        frames = []
+        mouth_images = self._get_mouth_images()
+        if not mouth_images:
+            # Fallback to old method
+            yield from self._generate_frames_fallback(lip_sync_data, word)
+            return
+        
+        # Create frame for each time point using actual images
+        frame_shapes = self._frame_shapes(mouth_cues, total_frames)
+        yield from self._render_frames(frame_shapes, word, mouth_images)
+    
+    def _get_mouth_images(self) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Mouth shape tiles from the rhubarb_mouths folder, loaded once per frame size
+        
+        Returns:
+            Shape letter to RGB tile, or None when no images could be found
+        """
+        if self._mouth_images is not None:
+            return self._mouth_images
         
         # Load mouth shape images from rhubarb_mouths folder
         mouth_images = {}
@@ -361,119 +549,283 @@ class RealRhubarbLipSync:
             mouth_dir = Path("c:/Users/Shafiqha/Desktop/aphi/backup/media/rhubarb_mouths")
             if not mouth_dir.exists():
                 print(f"⚠️ Backup mouth shapes directory not found either")
-                # Fallback to old method
-                return self._generate_frames_fallback(lip_sync_data, word)
+                return None
         
         # Load all mouth shape images
-        print(f"📁 Loading mouth shapes from: {mouth_dir}")
+        logger.debug("Loading mouth shapes from: %s", mouth_dir)
+        # List the folder once instead of stat-ing every candidate file
+        present = {entry.name: entry.path for entry in os.scandir(mouth_dir) if entry.is_file()}
         # Use uppercase filenames to match actual files in the folder
         for shape in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'O', 'X']:
             # Use uppercase filename to match actual files
-            image_path = mouth_dir / f"{shape}.png"
-            if image_path.exists():
+            filename = f"{shape}.png"
+            if filename in present:
                 try:
-                    mouth_images[shape] = Image.open(str(image_path)).convert('RGBA')
-                    print(f"✅ Loaded mouth shape: {shape} from {shape}.png")
+                    mouth_images[shape] = self._load_mouth_image(Path(present[filename]))
+                    logger.debug("Loaded mouth shape: %s from %s", shape, filename)
                 except Exception as e:
-                    print(f"⚠️ Error loading mouth shape {shape}: {e}")
+                    logger.warning("Error loading mouth shape %s: %s", shape, e)
             else:
-                print(f"⚠️ Mouth shape image not found: {image_path}")
+                logger.debug("Mouth shape image not found: %s", mouth_dir / filename)
                 # Try to find alternative image if missing
-                if shape == 'I':
-                    alt_path = mouth_dir / "H.png"  # Use H as fallback for I
-                    if alt_path.exists():
-                        mouth_images[shape] = Image.open(str(alt_path)).convert('RGBA')
-                        print(f"✅ Using alternative mouth shape H for {shape}")
-                elif shape == 'O':
-                    alt_path = mouth_dir / "O.png"  # Use O directly
-                    if alt_path.exists():
-                        mouth_images[shape] = Image.open(str(alt_path)).convert('RGBA')
-                        print(f"✅ Using mouth shape O for {shape}")
-                elif shape == 'X':
-                    alt_path = mouth_dir / "X.png"  # Use X directly
-                    if alt_path.exists():
-                        mouth_images[shape] = Image.open(str(alt_path)).convert('RGBA')
-                        print(f"✅ Using mouth shape X for {shape}")
+                if shape == 'I' and "H.png" in present:  # Use H as fallback for I
+                    mouth_images[shape] = self._load_mouth_image(Path(present["H.png"]))
+                    logger.debug("Using alternative mouth shape H for %s", shape)
         
         if not mouth_images:
             print("⚠️ No mouth shape images found, using fallback method")
-            return self._generate_frames_fallback(lip_sync_data, word)
-        
-        print(f"✅ Loaded {len(mouth_images)} mouth shape images")
+            return None
         
-        # Create frame for each time point
-        for frame_idx in range(total_frames):
-            time_sec = frame_idx / self.fps
-            
-            # Find which mouth shape to use at this time
-            mouth_shape = 'A'  # Default rest
-            for cue in mouth_cues:
-                if cue['start'] <= time_sec < cue['end']:
-                    mouth_shape = cue['value']
-                    break
-            
-            # Generate frame with this mouth shape using actual images
-            frame = self._create_frame_with_image(mouth_shape, word, time_sec, mouth_images)
-            frames.append(frame)
+        logger.info("Loaded %d mouth shape images from %s", len(mouth_images), mouth_dir)
+        self._mouth_images = self._SHARED_MOUTH_IMAGES[(self.width, self.height)] = mouth_images
+        return mouth_images
+    
+    def _load_mouth_image(self, image_path: Path) -> np.ndarray:
+        """
+        Load a mouth shape image as an opaque RGB tile ready to copy onto the face
         
-        return frames
+        The image is resized to MOUTH_SIZE (bilinear is indistinguishable from
+        Lanczos at 200px) and alpha-composited onto the matching crop of the
+        static face layer once, so frames need no per-pixel blending.
+        """
+        mouth_img = Image.open(str(image_path)).convert('RGBA').resize(self.MOUTH_SIZE, Image.BILINEAR)
+        mouth_x, mouth_y = self._mouth_pos
+        tile = self._get_face_layer().crop((mouth_x, mouth_y,
+                                            mouth_x + self.MOUTH_SIZE[0], mouth_y + self.MOUTH_SIZE[1]))
+        tile.paste(mouth_img, (0, 0), mouth_img)
+        return np.asarray(tile)
         
-    def _generate_frames_fallback(self, lip_sync_data: Dict, word: str) -> List[Image.Image]:
-        """Fallback method to generate frames if images are not available"""
+    def _generate_frames_fallback(self, lip_sync_data: Dict, word: str) -> Iterator[np.ndarray]:
+        """Fallback method to generate frames (lazily) if images are not available"""
         
         mouth_cues = lip_sync_data['mouthCues']
         duration = lip_sync_data['metadata']['duration']
         total_frames = int(duration * self.fps)
         
-        frames = []
-        
         # Create frame for each time point
-        for frame_idx in range(total_frames):
-            time_sec = frame_idx / self.fps
-            
-            # Find which mouth shape to use at this time
-            mouth_shape = 'A'  # Default rest
-            for cue in mouth_cues:
-                if cue['start'] <= time_sec < cue['end']:
-                    mouth_shape = cue['value']
-                    break
+        frame_shapes = self._frame_shapes(mouth_cues, total_frames)
+        yield from self._render_frames(frame_shapes, word)
+    
+    def _render_frames(self, frame_shapes: List[str], word: str, mouth_images: Optional[Dict[str, np.ndarray]] = None) -> Iterator[np.ndarray]:
+        """Render frames in order, spreading long clips across worker processes"""
+        tasks = [(mouth_shape, word, frame_idx / self.fps) for frame_idx, mouth_shape in enumerate(frame_shapes)]
+        
+        if len(tasks) < self.PARALLEL_MIN_FRAMES:
+            for mouth_shape, word, time_sec in tasks:
+                yield self._render_frame(mouth_shape, word, time_sec, mouth_images)
+            return
+        
+        # Build the cached avatar layers before they are pickled to the workers
+        if mouth_images:
+            self._get_face_layer()
+        self._get_avatar_layer()
+        
+        # With mouth images a frame is a memoized shape frame plus the label band,
+        # so workers only render the bands (the FreeType text drawing) and the
+        # frames are composited here into the preallocated buffer
+        bands_only = bool(mouth_images) and all(
+            self._resolve_image_shape(mouth_shape, mouth_images) in mouth_images
+            for mouth_shape in set(frame_shapes)
+        )
+        
+        with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                 initializer=_init_frame_worker,
+                                 initargs=(self, mouth_images)) as executor:
+            if not bands_only:
+                yield from executor.map(_render_frame_worker, tasks, chunksize=16)
+                return
             
-            # Generate frame with this mouth shape
-            frame = self._create_professional_frame(mouth_shape, word, time_sec)
-            frames.append(frame)
+            bands = executor.map(_render_label_band_worker, tasks, chunksize=16)
+            for (mouth_shape, word, _), band in zip(tasks, bands):
+                mouth_shape = self._resolve_image_shape(mouth_shape, mouth_images)
+                yield self._compose_image_frame(mouth_shape, word, band, mouth_images)
+    
+    def _render_frame(self, mouth_shape: str, word: str, time_sec: float, mouth_images: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+        """Render one frame from mouth images if available, otherwise with the drawn avatar"""
+        if mouth_images:
+            return self._create_frame_with_image(mouth_shape, word, time_sec, mouth_images)
+        return np.asarray(self._create_professional_frame(mouth_shape, word, time_sec))
+    
+    def _frame_shapes(self, mouth_cues: List[Dict], total_frames: int) -> List[str]:
+        """
+        Build the frame -> mouth shape table in one pass over the cues
         
-        return frames
+        Frame i (at i / fps seconds) gets the first cue with start <= t < end,
+        or 'A' (rest) when no cue covers it.
+        """
+        shapes = ['A'] * total_frames
+        # Fill in reverse so earlier cues win where cues overlap
+        for cue in reversed(mouth_cues):
+            first = self._first_frame_at(cue['start'], total_frames)
+            last = self._first_frame_at(cue['end'], total_frames)
+            shapes[first:last] = [cue['value']] * max(last - first, 0)
+        return shapes
+    
+    def _first_frame_at(self, time_sec: float, total_frames: int) -> int:
+        """Index of the first frame whose timestamp is >= time_sec"""
+        frame_idx = min(max(math.ceil(time_sec * self.fps), 0), total_frames)
+        # Correct float rounding so this agrees with frame_idx / fps comparisons
+        while frame_idx > 0 and (frame_idx - 1) / self.fps >= time_sec:
+            frame_idx -= 1
+        while frame_idx < total_frames and frame_idx / self.fps < time_sec:
+            frame_idx += 1
+        return frame_idx
+        
+    def _create_frame_with_image(self, mouth_shape: str, word: str, time_sec: float, mouth_images: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Create a frame using actual mouth shape images
         
-    def _create_frame_with_image(self, mouth_shape: str, word: str, time_sec: float, mouth_images: Dict[str, Image.Image]) -> Image.Image:
-        """Create a frame using actual mouth shape images"""
+        The frame is composited in place into a reused buffer, so it is only
+        valid until the next frame is created.
+        """
+        
+        mouth_shape = self._resolve_image_shape(mouth_shape, mouth_images)
+            
+        if mouth_shape not in mouth_images:
+            # Fallback to drawing if image not available
+            return np.asarray(self._create_professional_frame(mouth_shape, word, time_sec))
+        
+        band = self._render_label_band(mouth_shape, word, time_sec, mouth_images)
+        return self._compose_image_frame(mouth_shape, word, band, mouth_images)
+    
+    def _resolve_image_shape(self, mouth_shape: str, mouth_images: Dict[str, np.ndarray]) -> str:
+        """Get mouth shape image (use 'A' as fallback if not available)"""
+        return mouth_shape if mouth_shape in mouth_images else 'A'
+    
+    def _render_label_band(self, mouth_shape: str, word: str, time_sec: float, mouth_images: Dict[str, np.ndarray]) -> np.ndarray:
+        """Bottom band of the shape's frame with the Rhubarb info bar drawn on"""
+        band = Image.fromarray(self._get_shape_frame(mouth_shape, word, mouth_images)[self._label_band_top:])
+        self._draw_frame_label(ImageDraw.Draw(band), mouth_shape, time_sec, self._label_band_top)
+        return np.asarray(band)
+    
+    def _compose_image_frame(self, mouth_shape: str, word: str, band: np.ndarray, mouth_images: Dict[str, np.ndarray]) -> np.ndarray:
+        """Memoized shape frame plus its label band, composited into the reused frame buffer"""
+        frame = self._frame_buf
+        np.copyto(frame[:self._label_band_top], self._get_shape_frame(mouth_shape, word, mouth_images)[:self._label_band_top])
+        frame[self._label_band_top:] = band
+        return frame
+    
+    def _get_shape_frame(self, mouth_shape: str, word: str, mouth_images: Dict[str, np.ndarray]) -> np.ndarray:
+        """Titled face with the mouth tile for this shape, rendered once per shape per animation"""
+        cache = self._shape_frame_cache
+        if cache is None or cache[0] != word or cache[1] is not mouth_images:
+            if word.lower() in self._FIXED_WORD_CUES:
+                # Reuse the fixed word's shape frames from earlier animations
+                cache = self._prebaked_shape_frames.get(word)
+                if cache is None or cache[1] is not mouth_images:
+                    cache = self._prebaked_shape_frames[word] = (word, mouth_images, {})
+                self._shape_frame_cache = cache
+            else:
+                cache = self._shape_frame_cache = (word, mouth_images, {})
+        
+        shape_frames = cache[2]
+        if mouth_shape not in shape_frames:
+            # Copy the mouth shape tile (already blended onto the face at load time) into the titled face
+            shape_frame = self._get_titled_face_layer(word).copy()
+            mouth_tile = mouth_images[mouth_shape]
+            mouth_x, mouth_y = self._mouth_pos
+            shape_frame[mouth_y:mouth_y + mouth_tile.shape[0], mouth_x:mouth_x + mouth_tile.shape[1]] = mouth_tile
+            shape_frames[mouth_shape] = shape_frame
+        return shape_frames[mouth_shape]
+    
+    def _create_professional_frame(self, mouth_shape: str, word: str, time_sec: float) -> Image.Image:
+        """Create a professional 2D animated frame with Rhubarb mouth shape"""
         
-        # Create image with gradient background
-        img = Image.new('RGB', (self.width, self.height))
+        # Start from the cached avatar with this mouth shape already drawn
+        img = self._get_avatar_with_mouth(mouth_shape).copy()
         draw = ImageDraw.Draw(img)
         
-        # Gradient background (blue to white)
-        for y in range(self.height):
-            color_val = int(200 + (y / self.height) * 55)
-            draw.rectangle([0, y, self.width, y+1], fill=(color_val-50, color_val-30, color_val))
+        # Draw labels
+        self._draw_labels(draw, mouth_shape, word, time_sec)
         
-        # Avatar position
+        return img
+    
+    def _draw_labels(self, draw: ImageDraw.Draw, mouth_shape: str, word: str, time_sec: float):
+        """Draw the word at the top and the Rhubarb shape/time bar at the bottom"""
+        self._draw_word_title(draw, word)
+        self._draw_frame_label(draw, mouth_shape, time_sec)
+    
+    def _draw_word_title(self, draw: ImageDraw.Draw, word: str):
+        """Draw the word at the top of the frame"""
         center_x = self.width // 2
-        center_y = self.height // 2 - 30
         
-        # Get mouth shape image (use 'A' as fallback if not available)
-        if mouth_shape not in mouth_images:
-            mouth_shape = 'A'
-            
-        if mouth_shape in mouth_images:
-            # Paste mouth shape image
-            mouth_img = mouth_images[mouth_shape]
-            # Resize mouth image to appropriate size (adjust as needed)
-            mouth_size = (200, 200)
-            mouth_img = mouth_img.resize(mouth_size, Image.LANCZOS)
-            
-            # Calculate position to paste mouth image
-            mouth_x = center_x - mouth_size[0] // 2
-            mouth_y = center_y + 50  # Position mouth in the lower part of face
+        # Word at top (its position only depends on the word, so measure it once)
+        word_text = f'"{word.upper()}"'
+        if word_text not in self._word_text_x:
+            bbox = draw.textbbox((0, 0), word_text, font=self._font_large)
+            self._word_text_x[word_text] = center_x - (bbox[2] - bbox[0])//2
+        draw.text((self._word_text_x[word_text], 30), word_text, fill=(50, 50, 50), font=self._font_large)
+    
+    def _draw_frame_label(self, draw: ImageDraw.Draw, mouth_shape: str, time_sec: float, y_offset: int = 0):
+        """Draw the Rhubarb shape/time bar at the bottom (y_offset: top row of the drawn-on region)"""
+        center_x = self.width // 2
+        
+        # Rhubarb info at bottom
+        label = f"Rhubarb Shape: {mouth_shape} | Time: {time_sec:.2f}s"
+        bbox = draw.textbbox((0, 0), label, font=self._font_small)
+        text_width = bbox[2] - bbox[0]
+        
+        label_y = self.height - 50 - y_offset
+        draw.rectangle([center_x - text_width//2 - 10, label_y - 5,
+                       center_x + text_width//2 + 10, label_y + 25],
+                      fill=(50, 50, 50, 230))
+        draw.text((center_x - text_width//2, label_y), label, fill=(255, 255, 255), font=self._font_small)
+    
+    def _load_fonts(self):
+        """Load the label fonts, falling back to PIL's default font"""
+        try:
+            self._font_large = ImageFont.truetype("arial.ttf", 32)
+            self._font_small = ImageFont.truetype("arial.ttf", 18)
+        except:
+            self._font_large = ImageFont.load_default()
+            self._font_small = ImageFont.load_default()
+    
+    def __getstate__(self):
+        # Font objects are not always picklable; worker processes reload them
+        state = self.__dict__.copy()
+        state.pop('_font_large', None)
+        state.pop('_font_small', None)
+        # Workers only need the current animation's shape frames
+        state['_prebaked_shape_frames'] = {}
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._load_fonts()
+    
+    def _get_avatar_layer(self) -> Image.Image:
+        """Gradient background with the professional avatar minus the mouth, rendered once"""
+        if self._avatar_cache is None:
+            img = Image.fromarray(self._background)
+            draw = ImageDraw.Draw(img)
+            self._draw_avatar_features(draw, self.width // 2, self.height // 2 - 30)
+            self._avatar_cache = self._SHARED_AVATAR_LAYERS[(self.width, self.height)] = img
+        return self._avatar_cache
+    
+    def _get_avatar_with_mouth(self, mouth_shape: str) -> Image.Image:
+        """Avatar layer with the drawn mouth for this shape, rendered once per shape"""
+        if mouth_shape not in self._avatar_mouth_cache:
+            img = self._get_avatar_layer().copy()
+            draw = ImageDraw.Draw(img)
+            self._draw_rhubarb_mouth(draw, self.width // 2, self.height // 2 - 30 + 100, mouth_shape)
+            self._avatar_mouth_cache[mouth_shape] = img
+        return self._avatar_mouth_cache[mouth_shape]
+    
+    def _get_titled_face_layer(self, word: str) -> np.ndarray:
+        """Face layer with the word title drawn on, cached for the current word"""
+        if self._titled_face_cache is None or self._titled_face_cache[0] != word:
+            img = self._get_face_layer().copy()
+            self._draw_word_title(ImageDraw.Draw(img), word)
+            self._titled_face_cache = (word, np.asarray(img))
+        return self._titled_face_cache[1]
+    
+    def _get_face_layer(self) -> Image.Image:
+        """Gradient background with the simple face and eyes used behind mouth images, rendered once"""
+        if self._face_cache is None:
+            img = Image.fromarray(self._background)
+            draw = ImageDraw.Draw(img)
+            center_x = self.width // 2
+            center_y = self.height // 2 - 30
             
             # Create face background
             face_w, face_h = 280, 340
@@ -499,87 +851,19 @@ class RealRhubarbLipSync:
                 # Pupil
                 draw.ellipse([eye_x - 6, eye_y - 6, eye_x + 6, eye_y + 6], fill=(20, 20, 20))
             
-            # Paste mouth image onto face
-            img.paste(mouth_img, (mouth_x, mouth_y), mouth_img)
-        else:
-            # Fallback to drawing if image not available
-            self._draw_professional_avatar(draw, center_x, center_y, mouth_shape)
-        
-        # Draw labels
-        try:
-            font_large = ImageFont.truetype("arial.ttf", 32)
-            font_small = ImageFont.truetype("arial.ttf", 18)
-        except:
-            font_large = ImageFont.load_default()
-            font_small = ImageFont.load_default()
-        
-        # Word at top
-        word_text = f'"{word.upper()}"'
-        bbox = draw.textbbox((0, 0), word_text, font=font_large)
-        text_width = bbox[2] - bbox[0]
-        draw.text((center_x - text_width//2, 30), word_text, fill=(50, 50, 50), font=font_large)
-        
-        # Rhubarb info at bottom
-        label = f"Rhubarb Shape: {mouth_shape} | Time: {time_sec:.2f}s"
-        bbox = draw.textbbox((0, 0), label, font=font_small)
-        text_width = bbox[2] - bbox[0]
-        
-        label_y = self.height - 50
-        draw.rectangle([center_x - text_width//2 - 10, label_y - 5,
-                       center_x + text_width//2 + 10, label_y + 25],
-                      fill=(50, 50, 50, 230))
-        draw.text((center_x - text_width//2, label_y), label, fill=(255, 255, 255), font=font_small)
-        
-        return img
-    
-    def _create_professional_frame(self, mouth_shape: str, word: str, time_sec: float) -> Image.Image:
-        """Create a professional 2D animated frame with Rhubarb mouth shape"""
-        
-        # Create image with gradient background
-        img = Image.new('RGB', (self.width, self.height))
-        draw = ImageDraw.Draw(img)
-        
-        # Gradient background (blue to white)
-        for y in range(self.height):
-            color_val = int(200 + (y / self.height) * 55)
-            draw.rectangle([0, y, self.width, y+1], fill=(color_val-50, color_val-30, color_val))
-        
-        # Avatar position
-        center_x = self.width // 2
-        center_y = self.height // 2 - 30
-        
-        # Draw professional avatar
-        self._draw_professional_avatar(draw, center_x, center_y, mouth_shape)
-        
-        # Draw labels
-        try:
-            font_large = ImageFont.truetype("arial.ttf", 32)
-            font_small = ImageFont.truetype("arial.ttf", 18)
-        except:
-            font_large = ImageFont.load_default()
-            font_small = ImageFont.load_default()
-        
-        # Word at top
-        word_text = f'"{word.upper()}"'
-        bbox = draw.textbbox((0, 0), word_text, font=font_large)
-        text_width = bbox[2] - bbox[0]
-        draw.text((center_x - text_width//2, 30), word_text, fill=(50, 50, 50), font=font_large)
-        
-        # Rhubarb info at bottom
-        label = f"Rhubarb Shape: {mouth_shape} | Time: {time_sec:.2f}s"
-        bbox = draw.textbbox((0, 0), label, font=font_small)
-        text_width = bbox[2] - bbox[0]
-        
-        label_y = self.height - 50
-        draw.rectangle([center_x - text_width//2 - 10, label_y - 5,
-                       center_x + text_width//2 + 10, label_y + 25],
-                      fill=(50, 50, 50, 230))
-        draw.text((center_x - text_width//2, label_y), label, fill=(255, 255, 255), font=font_small)
-        
-        return img
+            self._face_cache = img
+        return self._face_cache
     
     def _draw_professional_avatar(self, draw: ImageDraw.Draw, x: int, y: int, mouth_shape: str):
         """Draw professional 2D avatar with Rhubarb mouth shape - Enhanced version"""
+        self._draw_avatar_features(draw, x, y)
+        
+        # Rhubarb mouth shape - positioned better
+        mouth_y = y + 100
+        self._draw_rhubarb_mouth(draw, x, mouth_y, mouth_shape)
+    
+    def _draw_avatar_features(self, draw: ImageDraw.Draw, x: int, y: int):
+        """Draw everything of the professional avatar except the mouth"""
         
         # Neck and shoulders (for more realistic look)
         neck_y = y + 150
@@ -650,10 +934,6 @@ class RealRhubarbLipSync:
         # Nostrils - more subtle
         draw.ellipse([x - 10, nose_y + 12, x - 4, nose_y + 18], fill=(200, 170, 150))
         draw.ellipse([x + 4, nose_y + 12, x + 10, nose_y + 18], fill=(200, 170, 150))
-        
-        # Rhubarb mouth shape - positioned better
-        mouth_y = y + 100
-        self._draw_rhubarb_mouth(draw, x, mouth_y, mouth_shape)
     
     def _draw_rhubarb_mouth(self, draw: ImageDraw.Draw, x: int, y: int, shape: str):
         """Draw enhanced Rhubarb Preston Blair mouth shapes"""
@@ -683,13 +963,9 @@ class RealRhubarbLipSync:
             # Mouth opening
             draw.ellipse([x - 45, y - 20, x + 45, y + 20], fill=lip_color, outline=lip_outline, width=3)
             # Upper teeth (individual teeth)
-            for i in range(-3, 4):
-                tooth_x = x + i * 12
-                draw.rectangle([tooth_x - 5, y - 12, tooth_x + 5, y - 4], fill=teeth_color, outline=(230, 230, 220))
+            self._draw_teeth_row(draw, x, y - 12, y - 4, 7, 12, 5, teeth_color, outline=(230, 230, 220))
             # Lower teeth
-            for i in range(-3, 4):
-                tooth_x = x + i * 12
-                draw.rectangle([tooth_x - 5, y + 4, tooth_x + 5, y + 12], fill=teeth_color, outline=(230, 230, 220))
+            self._draw_teeth_row(draw, x, y + 4, y + 12, 7, 12, 5, teeth_color, outline=(230, 230, 220))
             # Tongue hint
             draw.ellipse([x - 15, y - 2, x + 15, y + 8], fill=tongue_color)
         
@@ -697,13 +973,9 @@ class RealRhubarbLipSync:
             # Large mouth opening
             draw.ellipse([x - 55, y - 40, x + 55, y + 40], fill=inner_mouth, outline=lip_outline, width=4)
             # Upper teeth row
-            for i in range(-4, 5):
-                tooth_x = x + i * 11
-                draw.rectangle([tooth_x - 5, y - 35, tooth_x + 5, y - 24], fill=teeth_color, outline=(230, 230, 220))
+            self._draw_teeth_row(draw, x, y - 35, y - 24, 9, 11, 5, teeth_color, outline=(230, 230, 220))
             # Lower teeth row
-            for i in range(-4, 5):
-                tooth_x = x + i * 11
-                draw.rectangle([tooth_x - 5, y + 24, tooth_x + 5, y + 35], fill=teeth_color, outline=(230, 230, 220))
+            self._draw_teeth_row(draw, x, y + 24, y + 35, 9, 11, 5, teeth_color, outline=(230, 230, 220))
             # Tongue
             draw.ellipse([x - 30, y + 5, x + 30, y + 30], fill=tongue_color)
         
@@ -722,17 +994,13 @@ class RealRhubarbLipSync:
             # Small opening showing teeth
             draw.ellipse([x - 25, y - 8, x + 25, y + 8], fill=inner_mouth)
             # Upper teeth hint
-            for i in range(-2, 3):
-                tooth_x = x + i * 10
-                draw.rectangle([tooth_x - 4, y - 6, tooth_x + 4, y - 1], fill=teeth_color)
+            self._draw_teeth_row(draw, x, y - 6, y - 1, 5, 10, 4, teeth_color)
         
         elif shape == 'G':  # F, V - teeth on lip
             # Lower lip - made more prominent for V sound
             draw.ellipse([x - 45, y - 8, x + 45, y + 28], fill=lip_color, outline=lip_outline, width=3)
             # Upper teeth touching lower lip - more visible
-            for i in range(-3, 4):
-                tooth_x = x + i * 11
-                draw.rectangle([tooth_x - 5, y - 12, tooth_x + 5, y], fill=teeth_color, outline=(230, 230, 220))
+            self._draw_teeth_row(draw, x, y - 12, y, 7, 11, 5, teeth_color, outline=(230, 230, 220))
             # Upper lip hint
             draw.arc([x - 45, y - 15, x + 45, y], start=0, end=180, fill=lip_outline, width=3)
             # Enhanced lower lip for V sound
@@ -744,9 +1012,7 @@ class RealRhubarbLipSync:
             # Tongue touching roof
             draw.ellipse([x - 22, y - 18, x + 22, y + 5], fill=tongue_color, outline=(220, 110, 110), width=2)
             # Upper teeth
-            for i in range(-3, 4):
-                tooth_x = x + i * 11
-                draw.rectangle([tooth_x - 4, y - 20, tooth_x + 4, y - 12], fill=teeth_color)
+            self._draw_teeth_row(draw, x, y - 20, y - 12, 7, 11, 4, teeth_color)
         
         elif shape == 'X':  # W, R - rounded forward
             # Pursed lips
@@ -756,6 +1022,34 @@ class RealRhubarbLipSync:
             # Highlight on lips
             draw.arc([x - 28, y - 28, x - 10, y - 10], start=45, end=135, fill=(240, 140, 140), width=3)
     
+    # Fill/outline masks for rows of identical teeth, keyed by row geometry
+    _TEETH_ROW_MASKS = {}
+    
+    def _draw_teeth_row(self, draw: ImageDraw.Draw, x: int, top: int, bottom: int, count: int,
+                        spacing: int, half_width: int, fill, outline=None):
+        """Draw a row of evenly spaced teeth centred on x as one or two bitmap stamps"""
+        key = (bottom - top + 1, count, spacing, half_width, outline is not None)
+        if key not in self._TEETH_ROW_MASKS:
+            height, _, _, _, has_outline = key
+            # Column offset within each tooth's pitch; teeth never overlap
+            offset = np.arange((count - 1) * spacing + 2 * half_width + 1) % spacing
+            in_tooth = np.broadcast_to(offset <= 2 * half_width, (height, offset.size))
+            border = np.zeros_like(in_tooth)
+            if has_outline:
+                border = border | (offset == 0) | (offset == 2 * half_width)
+                border[[0, -1], :] = True
+                border &= in_tooth
+            self._TEETH_ROW_MASKS[key] = (
+                Image.fromarray(((in_tooth & ~border) * 255).astype(np.uint8), 'L'),
+                Image.fromarray((border * 255).astype(np.uint8), 'L'),
+            )
+        
+        fill_mask, outline_mask = self._TEETH_ROW_MASKS[key]
+        left = x - (count // 2) * spacing - half_width
+        draw.bitmap((left, top), fill_mask, fill=fill)
+        if outline is not None:
+            draw.bitmap((left, top), outline_mask, fill=outline)
+    
     def _create_fallback_timing(self, word: str) -> Dict:
         """Create simple fallback timing if Rhubarb fails"""
         duration = len(word) * 0.2  # 200ms per character
@@ -767,6 +1061,26 @@ class RealRhubarbLipSync:
         }
 
 
+# Per-process state for frame rendering workers
+_worker_renderer = None
+_worker_mouth_images = None
+
+def _init_frame_worker(renderer: RealRhubarbLipSync, mouth_images: Optional[Dict[str, np.ndarray]]):
+    global _worker_renderer, _worker_mouth_images
+    _worker_renderer = renderer
+    _worker_mouth_images = mouth_images
+
+def _render_label_band_worker(task) -> np.ndarray:
+    mouth_shape, word, time_sec = task
+    mouth_shape = _worker_renderer._resolve_image_shape(mouth_shape, _worker_mouth_images)
+    return _worker_renderer._render_label_band(mouth_shape, word, time_sec, _worker_mouth_images)
+
+def _render_frame_worker(task) -> np.ndarray:
+    mouth_shape, word, time_sec = task
+    # Copy out of the worker's reused frame buffer before the result is queued
+    return np.array(_worker_renderer._render_frame(mouth_shape, word, time_sec, _worker_mouth_images))
+
+
 # Singleton
 _instance = None
 
@@ -7,6 +7,10 @@ Based on: https://github.com/scaredyfish/blender-rhubarb-lipsync
 import cv2
 import numpy as np
 import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Tuple
 from pathlib import Path
 from .phoneme_viseme_mapper import get_phoneme_viseme_mapper
@@ -61,6 +65,17 @@ class RhubarbLipSync:
         'i': 'F', 'ʃ': 'C', 'ʒ': 'C', 'tʃ': 'C', 'dʒ': 'C',
     }
     
+    # Size mouth images are blended onto the face at
+    MOUTH_SIZE = (200, 200)
+    
+    # Blended mouth images shared across instances, keyed by (width, height)
+    _SHARED_MOUTH_CACHE = {}
+    
+    # Rows at the top of the frame holding the label box and its text (the mouth is placed below)
+    LABEL_BAND_HEIGHT = 70
+    # Label bands shared across instances, keyed by (width, height)
+    _SHARED_LABEL_CACHE = {}
+    
     def __init__(self, width: int = 640, height: int = 480, fps: int = 30):
         """Initialize Rhubarb Lip Sync generator"""
         self.width = width
@@ -68,27 +83,40 @@ class RhubarbLipSync:
         self.fps = fps
         self.mapper = get_phoneme_viseme_mapper()
         
-        # Create mouth shapes directory
+        # Static face drawn once; each frame only adds the mouth and label text
+        self._face_template = self._build_face_template()
+        
+        # Mouth images are placed below the nose, when they fit in the frame
+        mouth_w, mouth_h = self.MOUTH_SIZE
+        mouth_y = self.height // 2 + 80
+        mouth_x = self.width // 2 - mouth_w // 2
+        y1, y2 = mouth_y, mouth_y + mouth_h
+        x1, x2 = mouth_x, mouth_x + mouth_w
+        if y2 <= self.height and x2 <= self.width and y1 >= 0 and x1 >= 0:
+            self._mouth_box = (y1, y2, x1, x2)
+        else:
+            self._mouth_box = None
+        
+        # Blended mouth images by Rhubarb shape, filled on first use and shared
+        # by every instance of the same size
+        self._mouth_cache = self._SHARED_MOUTH_CACHE.setdefault((self.width, self.height), {})
+        self._label_cache = self._SHARED_LABEL_CACHE.setdefault((self.width, self.height), {})
+        
+        # Mouth shapes directory (the 9 PNGs ship with the repo; shapes missing
+        # from it are drawn in memory on first use, see _get_mouth_image)
         api_dir = Path(__file__).parent.parent / 'api'
         self.mouth_dir = api_dir / 'media' / 'rhubarb_mouths'
-        self.mouth_dir.mkdir(parents=True, exist_ok=True)
         
         print(f"📁 Rhubarb mouth shapes directory: {self.mouth_dir}")
-        
-        # Generate mouth shape images if they don't exist
-        try:
-            existing_shapes = list(self.mouth_dir.glob("*.png"))
-            if len(existing_shapes) < 9:
-                print(f"⚠️ Found only {len(existing_shapes)} mouth shapes, generating all 9...")
-                self._generate_rhubarb_mouths()
-            else:
-                print(f"✅ Found {len(existing_shapes)} mouth shapes")
-        except Exception as e:
-            print(f"⚠️ Error checking mouth shapes: {e}, generating...")
-            self._generate_rhubarb_mouths()
     
-    def _generate_rhubarb_mouths(self):
-        """Generate all 9 Rhubarb mouth shapes"""
+    def _generate_rhubarb_mouths(self, overwrite: bool = False):
+        """
+        Generate all 9 Rhubarb mouth shapes
+        
+        Args:
+            overwrite: Redraw shapes whose PNG already exists
+        """
+        self.mouth_dir.mkdir(parents=True, exist_ok=True)
         
         mouth_generators = {
             'A': self._draw_mouth_A,  # Rest
@@ -104,7 +132,7 @@ class RhubarbLipSync:
         
         for shape_name, generator_func in mouth_generators.items():
             img_path = self.mouth_dir / f"{shape_name}.png"
-            if not img_path.exists():
+            if overwrite or not img_path.exists():
                 img = generator_func()
                 cv2.imwrite(str(img_path), img)
                 print(f"✅ Generated mouth shape: {shape_name}")
@@ -232,9 +260,8 @@ class RhubarbLipSync:
         # Upper teeth on lower lip
         cv2.rectangle(canvas, (80, 135), (220, 150), (255, 255, 255), -1)
         
-        # Teeth outline
-        for x in range(80, 220, 20):
-            cv2.line(canvas, (x, 135), (x, 150), (230, 230, 230), 1)
+        # Teeth outline (1px vertical lines every 20px, painted in one slice)
+        canvas[135:151, 80:220:20] = (230, 230, 230)
         
         return canvas
     
@@ -281,7 +308,11 @@ class RhubarbLipSync:
     
     def phoneme_to_rhubarb(self, phoneme: str) -> str:
         """Convert phoneme to Rhubarb mouth shape"""
-        return self.PHONEME_TO_RHUBARB.get(phoneme.lower(), 'A')
+        # The table's keys are lowercase, so most phonemes hit without lowercasing
+        rhubarb_shape = self.PHONEME_TO_RHUBARB.get(phoneme)
+        if rhubarb_shape is None:
+            rhubarb_shape = self.PHONEME_TO_RHUBARB.get(phoneme.lower(), 'A')
+        return rhubarb_shape
     
     def generate_animation(self, word: str, language: str = 'en', 
                           output_path: str = None) -> str:
@@ -303,108 +334,138 @@ class RhubarbLipSync:
         
         print(f"🎬 Generating Rhubarb animation: {output_path}")
         
-        # Initialize video writer with H.264 codec (browser-compatible)
-        # Try different codecs in order of preference
-        codecs_to_try = [
-            ('avc1', 'H.264'),  # Best for browsers
-            ('H264', 'H.264'),  # Alternative H.264
-            ('X264', 'H.264'),  # Another H.264 variant
-            ('mp4v', 'MPEG-4'), # Fallback
-        ]
+        # Create frames (a frame depends only on its phoneme, so each is rendered once)
+        phonemes = list(dict.fromkeys(viseme_info['phoneme'] for viseme_info in visemes))
+        rendered_frames = self._render_phoneme_frames(phonemes)
         
-        out = None
-        for codec_code, codec_name in codecs_to_try:
-            try:
-                fourcc = cv2.VideoWriter_fourcc(*codec_code)
-                out = cv2.VideoWriter(output_path, fourcc, self.fps, 
-                                     (self.width, self.height))
-                if out.isOpened():
-                    print(f"✅ Using codec: {codec_name} ({codec_code})")
-                    break
-                else:
-                    out.release()
-                    out = None
-            except Exception as e:
-                print(f"⚠️ Codec {codec_name} ({codec_code}) failed: {e}")
-                continue
-        
-        if out is None or not out.isOpened():
-            raise RuntimeError("Failed to initialize video writer with any codec")
-        
-        # Create frames
+        # The same frame is repeated for the whole viseme
+        frames = []
         for viseme_info in visemes:
-            phoneme = viseme_info['phoneme']
             duration_ms = viseme_info['duration']
             num_frames = max(1, int((duration_ms / 1000.0) * self.fps))
-            
-            # Get Rhubarb mouth shape
-            rhubarb_shape = self.phoneme_to_rhubarb(phoneme)
-            mouth_img_path = self.mouth_dir / f"{rhubarb_shape}.png"
-            
-            # Load mouth image
-            if mouth_img_path.exists():
-                mouth_img = cv2.imread(str(mouth_img_path))
-            else:
-                # Fallback to rest position
-                mouth_img = self._draw_mouth_A()
-            
-            # Create frame with face and mouth
-            for _ in range(num_frames):
-                frame = self._create_frame_with_mouth(
-                    mouth_img,
-                    phoneme,
-                    rhubarb_shape
-                )
-                out.write(frame)
+            frames.extend([rendered_frames[viseme_info['phoneme']]] * num_frames)
         
-        out.release()
+        # Encode straight to browser-compatible H.264 with ffmpeg if available
+        ffmpeg_path = shutil.which('ffmpeg')
+        if ffmpeg_path is None:
+            print(f"⚠️ ffmpeg not found, video may not play in all browsers")
+            print(f"   Install ffmpeg for best compatibility")
+        
+        if ffmpeg_path is None or not self._encode_with_ffmpeg(ffmpeg_path, frames, output_path):
+            self._write_with_opencv(frames, output_path)
         
         print(f"✅ Generated Rhubarb lip animation: {output_path}")
         print(f"   Word: {word} ({language})")
         print(f"   Phonemes: {len(visemes)}")
         print(f"   Duration: {viseme_data['total_duration']}ms")
         
-        # Convert to browser-compatible format using ffmpeg if available
-        try:
-            import subprocess
-            output_path_h264 = output_path.replace('.mp4', '_h264.mp4')
+        return output_path
+    
+    def _encode_with_ffmpeg(self, ffmpeg_path: str, frames: List[np.ndarray], output_path: str) -> bool:
+        """
+        Pipe raw BGR frames into ffmpeg's stdin for a single H.264 encode
+        
+        Returns:
+            True if ffmpeg wrote the video
+        """
+        cmd = [
+            ffmpeg_path, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f'{self.width}x{self.height}', '-r', str(self.fps),
+            '-i', '-',
+            '-c:v', 'libx264',  # H.264 codec
+            '-preset', 'ultrafast',  # Short clips: encode speed over file size
+            '-pix_fmt', 'yuv420p',  # Compatible pixel format
+            '-movflags', '+faststart',  # Enable streaming
+            output_path
+        ]
+        
+        with tempfile.TemporaryFile() as stderr_file:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr_file
+            )
+            try:
+                for frame in frames:
+                    # Contiguous uint8 arrays are written without an extra copy
+                    proc.stdin.write(frame)
+            except BrokenPipeError:
+                pass
+            finally:
+                proc.stdin.close()
+                returncode = proc.wait()
             
-            # Try to convert with ffmpeg
-            result = subprocess.run([
-                'ffmpeg', '-y', '-i', output_path,
-                '-c:v', 'libx264',  # H.264 codec
-                '-pix_fmt', 'yuv420p',  # Compatible pixel format
-                '-movflags', '+faststart',  # Enable streaming
-                output_path_h264
-            ], capture_output=True, timeout=30)
+            if returncode != 0:
+                stderr_file.seek(0)
+                error = stderr_file.read().decode(errors='replace').strip()
+                print(f"⚠️ ffmpeg encoding failed, falling back to OpenCV")
+                print(f"   Error: {error or 'Unknown'}")
+                return False
+        
+        print(f"✅ Video is browser-compatible (H.264)")
+        return True
+    
+    def _write_with_opencv(self, frames: List[np.ndarray], output_path: str):
+        """Write frames with OpenCV's MPEG-4 writer (used when ffmpeg is unavailable)"""
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(output_path, fourcc, self.fps, 
+                             (self.width, self.height))
+        
+        if not out.isOpened():
+            raise RuntimeError("Failed to initialize video writer")
+        
+        for frame in frames:
+            out.write(frame)
+        out.release()
+    
+    def _render_phoneme_frames(self, phonemes: List[str]) -> Dict[str, np.ndarray]:
+        """Render one frame per phoneme, on worker threads (OpenCV releases the GIL)"""
+        
+        # Get Rhubarb mouth shapes, filling the mouth cache before the threads start
+        shapes = [self.phoneme_to_rhubarb(phoneme) for phoneme in phonemes]
+        mouth_imgs = [self._get_mouth_image(rhubarb_shape) for rhubarb_shape in shapes]
+        
+        # Create frame with face and mouth
+        with ThreadPoolExecutor(max_workers=min(len(phonemes), os.cpu_count() or 1)) as executor:
+            frames = executor.map(self._create_frame_with_mouth, mouth_imgs, phonemes, shapes)
+            return dict(zip(phonemes, frames))
+    
+    def _get_mouth_image(self, rhubarb_shape: str) -> np.ndarray:
+        """Mouth shape image resized to MOUTH_SIZE and blended onto the face, built once per shape"""
+        if rhubarb_shape not in self._mouth_cache:
+            mouth_img_path = self.mouth_dir / f"{rhubarb_shape}.png"
             
-            if result.returncode == 0 and os.path.exists(output_path_h264):
-                print(f"✅ Converted to H.264: {output_path_h264}")
-                # Replace original with H.264 version
-                os.remove(output_path)
-                os.rename(output_path_h264, output_path)
-                print(f"✅ Video is now browser-compatible")
+            # Load mouth image
+            if mouth_img_path.exists():
+                mouth_img = cv2.imread(str(mouth_img_path))
             else:
-                print(f"⚠️ ffmpeg conversion failed, using original")
-                print(f"   Error: {result.stderr.decode() if result.stderr else 'Unknown'}")
-        except FileNotFoundError:
-            print(f"⚠️ ffmpeg not found, video may not play in all browsers")
-            print(f"   Install ffmpeg for best compatibility")
-        except Exception as e:
-            print(f"⚠️ Video conversion failed: {e}")
-            print(f"   Using original video")
-        
-        return output_path
+                # Draw the shape instead (fallback to rest position)
+                mouth_img = getattr(self, f"_draw_mouth_{rhubarb_shape}", self._draw_mouth_A)()
+            
+            mouth_resized = cv2.resize(mouth_img, self.MOUTH_SIZE)
+            
+            # The face under the mouth never changes, so blend it in once here
+            if self._mouth_box is not None:
+                y1, y2, x1, x2 = self._mouth_box
+                # Alpha blend for smooth integration
+                alpha = 0.9
+                mouth_resized = cv2.addWeighted(
+                    self._face_template[y1:y2, x1:x2], 1 - alpha,
+                    mouth_resized, alpha, 0
+                )
+            
+            self._mouth_cache[rhubarb_shape] = mouth_resized
+        return self._mouth_cache[rhubarb_shape]
     
-    def _create_frame_with_mouth(self, mouth_img: np.ndarray, 
-                                 phoneme: str, rhubarb_shape: str) -> np.ndarray:
-        """Create a complete frame with face, mouth, and labels"""
+    def _build_face_template(self) -> np.ndarray:
+        """Render the parts of a frame that never change between phonemes"""
         
-        # Create gradient background
-        frame = np.ones((self.height, self.width, 3), dtype=np.uint8)
-        for i in range(self.height):
-            color = int(240 - (i / self.height) * 40)
-            frame[i, :] = [color, color, 255]
+        # Create gradient background (one row colour per y, broadcast across the width)
+        color_vals = (240 - (np.arange(self.height) / self.height) * 40).astype(np.uint8)
+        gradient_rows = np.stack([color_vals, color_vals, np.full_like(color_vals, 255)], axis=1)
+        frame = np.broadcast_to(gradient_rows[:, None, :], (self.height, self.width, 3)).copy()
         
         # Draw face oval (skin tone)
         face_center = (self.width // 2, self.height // 2)
@@ -452,42 +513,46 @@ class RhubarbLipSync:
         cv2.ellipse(frame, (nose_tip[0] + 10, nose_tip[1] + 10), (6, 8), 
                    0, 0, 360, (150, 120, 100), -1)
         
-        # Place mouth image
-        mouth_h, mouth_w = mouth_img.shape[:2]
-        mouth_y = face_center[1] + 80
-        mouth_x = face_center[0] - mouth_w // 2
-        
-        # Resize mouth to fit
-        mouth_resized = cv2.resize(mouth_img, (200, 200))
-        mouth_h, mouth_w = mouth_resized.shape[:2]
-        mouth_x = face_center[0] - mouth_w // 2
-        
-        # Blend mouth onto face
-        y1, y2 = mouth_y, mouth_y + mouth_h
-        x1, x2 = mouth_x, mouth_x + mouth_w
-        
-        if y2 <= self.height and x2 <= self.width and y1 >= 0 and x1 >= 0:
-            # Alpha blend for smooth integration
-            alpha = 0.9
-            frame[y1:y2, x1:x2] = cv2.addWeighted(
-                frame[y1:y2, x1:x2], 1 - alpha,
-                mouth_resized, alpha, 0
-            )
-        
-        # Add text labels with background
-        label_text = f"Phoneme: {phoneme}  |  Shape: {rhubarb_shape}"
-        
-        # Text background
+        # Text background (the mouth is always placed below it)
         cv2.rectangle(frame, (10, 10), (self.width - 10, 60), 
                      (255, 255, 255), -1)
         cv2.rectangle(frame, (10, 10), (self.width - 10, 60), 
                      (100, 100, 100), 2)
         
-        # Text
-        cv2.putText(frame, label_text, (20, 40),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.9, (50, 50, 50), 2)
+        return frame
+    
+    def _create_frame_with_mouth(self, mouth_img: np.ndarray, 
+                                 phoneme: str, rhubarb_shape: str) -> np.ndarray:
+        """Create a complete frame with face, mouth, and labels"""
+        
+        # Start from the static face (background, face, eyes, nose, label box)
+        frame = self._face_template.copy()
+        
+        # Place mouth image (already blended onto the face by _get_mouth_image)
+        if self._mouth_box is not None:
+            y1, y2, x1, x2 = self._mouth_box
+            frame[y1:y2, x1:x2] = mouth_img
+        
+        # Add text labels (pre-rendered per label)
+        label_band = self._get_label_band(phoneme, rhubarb_shape)
+        frame[:label_band.shape[0]] = label_band
         
         return frame
+    
+    def _get_label_band(self, phoneme: str, rhubarb_shape: str) -> np.ndarray:
+        """Top rows of the face template with the label text drawn on, rendered once per label"""
+        key = (phoneme, rhubarb_shape)
+        label_band = self._label_cache.get(key)
+        if label_band is None:
+            label_band = self._face_template[:self.LABEL_BAND_HEIGHT].copy()
+            
+            label_text = f"Phoneme: {phoneme}  |  Shape: {rhubarb_shape}"
+            
+            # Text (the background box is part of the face template)
+            cv2.putText(label_band, label_text, (20, 40),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.9, (50, 50, 50), 2)
+            self._label_cache[key] = label_band
+        return label_band
 
 
 # Singleton instance
@@ -499,3 +564,11 @@ def get_rhubarb_lip_sync() -> RhubarbLipSync:
     if _rhubarb_generator is None:
         _rhubarb_generator = RhubarbLipSync()
     return _rhubarb_generator
+
+
+# Regenerate the mouth shape PNGs: python -m services.rhubarb_lip_sync --regenerate-assets
+if __name__ == "__main__":
+    import sys
+    
+    if "--regenerate-assets" in sys.argv:
+        get_rhubarb_lip_sync()._generate_rhubarb_mouths(overwrite=True)
@@ -5,10 +5,18 @@ Uses external mouth shape images (PNG sprites) for each Rhubarb shape
 
 import subprocess
 import json
+import functools
 import os
+import queue
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from itertools import groupby
 from pathlib import Path
-from typing import List, Dict, Optional
-from PIL import Image
+from typing import List, Dict, Optional, Iterable, Iterator, Union
+from PIL import Image, ImageDraw, ImageFont
 import numpy as np
 
 
@@ -23,7 +31,8 @@ class RhubarbWithSprites:
                  sprites_dir: str = None,
                  width: int = 800, 
                  height: int = 600, 
-                 fps: int = 15):
+                 fps: int = 15,
+                 show_time_label: bool = True):
         """
         Args:
             rhubarb_path: Path to rhubarb executable
@@ -31,6 +40,8 @@ class RhubarbWithSprites:
             width: Video width
             height: Video height
             fps: Frames per second
+            show_time_label: Show the running time under the shape label. Without it,
+                consecutive sprite frames of one shape are identical and rendered once.
         """
         # Find Rhubarb
         possible_paths = [
@@ -49,10 +60,17 @@ class RhubarbWithSprites:
         self.width = width
         self.height = height
         self.fps = fps
+        self.show_time_label = show_time_label
         
         # Find sprites directory
         self.sprites_dir = self._find_sprites_dir(sprites_dir)
         self.sprites = self._load_sprites()
+        self._resized_sprites = {}
+        
+        # Fonts are loaded once; everything but the time label is cached per shape
+        self._load_fonts()
+        self._shape_frame_cache = None
+        self._frame_buf = Image.new('RGB', (self.width, self.height))
         
         self.rhubarb_available = self.rhubarb_path is not None
         
@@ -67,7 +85,8 @@ class RhubarbWithSprites:
     def _check_rhubarb_path(self, path: str) -> bool:
         """Check if Rhubarb is accessible"""
         try:
-            result = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=5)
+            result = subprocess.run([path, "--version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    text=True, timeout=5)
             if result.returncode == 0:
                 print(f"✅ Rhubarb found: {result.stdout.strip()}")
                 return True
@@ -104,36 +123,17 @@ class RhubarbWithSprites:
         return None
     
     def _load_sprites(self) -> Dict[str, Image.Image]:
-        """Load mouth shape sprite images"""
-        sprites = {}
-        
+        """Load mouth shape sprite images (files are read once per process)"""
         if not self.sprites_dir:
-            return sprites
-        
-        # Try different naming conventions
-        for shape in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'X']:
-            possible_names = [
-                f"{shape}.png",
-                f"mouth_{shape}.png",
-                f"mouth-{shape}.png",
-                f"{shape.lower()}.png",
-                f"lisa-{shape}.png",  # Lisa character sprites
-                f"character-{shape}.png",
-                f"avatar-{shape}.png",
-            ]
-            
-            for name in possible_names:
-                sprite_path = os.path.join(self.sprites_dir, name)
-                if os.path.exists(sprite_path):
-                    try:
-                        img = Image.open(sprite_path).convert('RGBA')
-                        sprites[shape] = img
-                        print(f"  ✅ Loaded sprite: {shape} ({name})")
-                        break
-                    except Exception as e:
-                        print(f"  ⚠️ Failed to load {name}: {e}")
+            return {}
         
-        return sprites
+        return {
+            shape: Image.open(BytesIO(data)).convert('RGBA')
+            for shape, data in _load_sprite_files(self.sprites_dir).items()
+        }
+    
+    # Clips shorter than this are rendered in-process (worker start-up would dominate)
+    PARALLEL_MIN_FRAMES = 48
     
     def generate_animation(self, audio_path: str, word: str, output_path: str, language: str = "en") -> str:
         """
@@ -159,13 +159,33 @@ class RhubarbWithSprites:
             print(f"⚠️ Rhubarb failed: {e}, using fallback")
             lip_sync_data = self._create_fallback_timing(word)
         
-        # Generate frames
+        # Generate frames (lazily; a frame may be a reused buffer that is only
+        # valid until the next one)
         frames = self._generate_frames(lip_sync_data, word)
         
-        print(f"Generated {len(frames)} frames ({len(frames)/self.fps:.2f}s)")
-        
-        # Encode video
-        self._encode_video(frames, audio_path, output_path)
+        # Encode video, streaming frames straight into ffmpeg
+        ffmpeg_path = self._find_ffmpeg()
+        total_frames = int(lip_sync_data['metadata']['duration'] * self.fps)
+        has_audio = bool(audio_path) and os.path.exists(audio_path)
+        print(f"\n📹 Encoding video...")
+        if has_audio:
+            try:
+                frame_count = self._encode_with_ffmpeg(ffmpeg_path, frames, total_frames, audio_path, output_path)
+                print(f"✅ Audio track added")
+            except RuntimeError as e:
+                print(f"⚠️ Could not add audio: {e}")
+                print(f"   Video will be generated without audio track")
+                has_audio = False
+                # The failed run consumed the frame generator; start a fresh one
+                frames = self._generate_frames(lip_sync_data, word)
+        if not has_audio:
+            frame_count = self._encode_with_ffmpeg(ffmpeg_path, frames, total_frames, None, output_path)
+        
+        print(f"Generated {frame_count} frames ({frame_count/self.fps:.2f}s)")
+        print(f"\n✅ Video saved: {output_path}")
+        print(f"✅ Using: {'Sprite images' if self.sprites else 'Generated graphics'}")
+        print(f"✅ Audio: {'Embedded' if has_audio else 'None'}")
+        print(f"{'='*70}\n")
         
         return output_path
     
@@ -191,91 +211,183 @@ class RhubarbWithSprites:
         
         cmd = [self.rhubarb_path, "-f", "json", audio_path, "-o", output_json]
         
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        # Only stderr is needed, and only on failure
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=30)
         
         if result.returncode != 0:
-            raise RuntimeError(f"Rhubarb failed: {result.stderr}")
+            raise RuntimeError(f"Rhubarb failed: {result.stderr.decode('utf-8', errors='ignore')}")
         
-        with open(output_json, 'r') as f:
-            data = json.load(f)
+        # Parse the raw bytes; orjson is used when installed
+        with open(output_json, 'rb') as f:
+            raw = f.read()
+        try:
+            import orjson
+            data = orjson.loads(raw)
+        except ImportError:
+            data = json.loads(raw)
         
         print(f"✅ Rhubarb analysis: {data['metadata']['duration']:.2f}s, {len(data['mouthCues'])} cues")
         
         return data
     
-    def _generate_frames(self, lip_sync_data: Dict, word: str) -> List[Image.Image]:
-        """Generate video frames from Rhubarb data"""
+    def _generate_frames(self, lip_sync_data: Dict, word: str) -> Iterator[Union[Image.Image, bytes]]:
+        """Generate video frames from Rhubarb data (lazily)"""
         mouth_cues = lip_sync_data['mouthCues']
         duration = lip_sync_data['metadata']['duration']
         total_frames = int(duration * self.fps)
         
-        frames = []
+        # Find mouth shape for each frame time
+        frame_shapes = self._frame_shapes(mouth_cues, total_frames)
         
-        for frame_idx in range(total_frames):
-            time_sec = frame_idx / self.fps
-            
-            # Find mouth shape for this time
-            mouth_shape = 'A'
-            for cue in mouth_cues:
-                if cue['start'] <= time_sec < cue['end']:
-                    mouth_shape = cue['value']
-                    break
-            
-            # Create frame
-            if self.sprites and mouth_shape in self.sprites:
-                frame = self._create_frame_with_sprite(mouth_shape, word, time_sec)
-            else:
-                frame = self._create_frame_generated(mouth_shape, word, time_sec)
-            
-            frames.append(frame)
+        if not self.show_time_label:
+            yield from self._generate_deduped_frames(frame_shapes, word)
+            return
         
-        return frames
-    
-    def _create_frame_with_sprite(self, mouth_shape: str, word: str, time_sec: float) -> Image.Image:
-        """Create frame using sprite image"""
-        # Create background
-        img = Image.new('RGB', (self.width, self.height), color=(240, 240, 250))
+        tasks = [(mouth_shape, word, frame_idx / self.fps) for frame_idx, mouth_shape in enumerate(frame_shapes)]
         
-        # Get sprite
-        sprite = self.sprites[mouth_shape]
+        if len(tasks) < self.PARALLEL_MIN_FRAMES:
+            for task in tasks:
+                yield self._render_frame(*task)
+            return
         
-        # Resize sprite to fit nicely
-        sprite_width = int(self.width * 0.6)
-        sprite_height = int(sprite.height * (sprite_width / sprite.width))
-        sprite_resized = sprite.resize((sprite_width, sprite_height), Image.Resampling.LANCZOS)
+        # Build the cached sprite frames before they are pickled to the workers
+        for mouth_shape in {task[0] for task in tasks}:
+            if self.sprites and mouth_shape in self.sprites:
+                self._get_shape_frame(mouth_shape, word)
         
-        # Center sprite
-        x = (self.width - sprite_width) // 2
-        y = (self.height - sprite_height) // 2
+        with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                 initializer=_init_frame_worker,
+                                 initargs=(self,)) as executor:
+            yield from executor.map(_render_frame_worker, tasks, chunksize=16)
+    
+    def _generate_deduped_frames(self, frame_shapes: List[str], word: str) -> Iterator[Union[Image.Image, bytes]]:
+        """
+        Frames without a time label: each run of one sprite shape is rendered
+        and converted to raw bytes once, then repeated
+        """
+        frame_idx = 0
+        for mouth_shape, run in groupby(frame_shapes):
+            run_length = len(list(run))
+            if self.sprites and mouth_shape in self.sprites:
+                frame_bytes = self._render_frame(mouth_shape, word, frame_idx / self.fps).tobytes()
+                for _ in range(run_length):
+                    yield frame_bytes
+            else:
+                for i in range(frame_idx, frame_idx + run_length):
+                    yield self._render_frame(mouth_shape, word, i / self.fps)
+            frame_idx += run_length
+    
+    def _frame_shapes(self, mouth_cues: List[Dict], total_frames: int) -> List[str]:
+        """
+        Build the frame -> mouth shape table with a binary search per cue
         
-        # Paste sprite (with alpha channel)
-        img.paste(sprite_resized, (x, y), sprite_resized)
+        Frame i (at i / fps seconds) gets the first cue with start <= t < end,
+        or 'A' (rest) when no cue covers it.
+        """
+        frame_times = np.arange(total_frames) / self.fps
+        firsts = np.searchsorted(frame_times, [cue['start'] for cue in mouth_cues], side='left')
+        lasts = np.searchsorted(frame_times, [cue['end'] for cue in mouth_cues], side='left')
+        
+        shapes = ['A'] * total_frames
+        # Fill in reverse so earlier cues win where cues overlap
+        for cue, first, last in reversed(list(zip(mouth_cues, firsts.tolist(), lasts.tolist()))):
+            shapes[first:last] = [cue['value']] * max(last - first, 0)
+        return shapes
+    
+    def _render_frame(self, mouth_shape: str, word: str, time_sec: float) -> Image.Image:
+        """Create one frame, from the sprite when there is one for the shape"""
+        if self.sprites and mouth_shape in self.sprites:
+            return self._create_frame_with_sprite(mouth_shape, word, time_sec)
+        return self._create_frame_generated(mouth_shape, word, time_sec)
+    
+    def _create_frame_with_sprite(self, mouth_shape: str, word: str, time_sec: float) -> Image.Image:
+        """
+        Create frame using sprite image
         
-        # Add labels
-        from PIL import ImageDraw, ImageFont
+        The frame is drawn into one reused image, so it is only valid until
+        the next frame is created.
+        """
+        # Start from the cached background, sprite and word title for this shape
+        img = self._frame_buf
+        img.paste(self._get_shape_frame(mouth_shape, word))
         draw = ImageDraw.Draw(img)
         
-        try:
-            font_large = ImageFont.truetype("arial.ttf", 32)
-            font_small = ImageFont.truetype("arial.ttf", 18)
-        except:
-            font_large = ImageFont.load_default()
-            font_small = ImageFont.load_default()
-        
-        # Word at top
-        word_text = f'"{word.upper()}"'
-        bbox = draw.textbbox((0, 0), word_text, font=font_large)
-        text_width = bbox[2] - bbox[0]
-        draw.text((self.width//2 - text_width//2, 30), word_text, fill=(50, 50, 50), font=font_large)
-        
         # Shape label at bottom
-        label = f"Rhubarb Shape: {mouth_shape} | Time: {time_sec:.2f}s"
-        bbox = draw.textbbox((0, 0), label, font=font_small)
-        text_width = bbox[2] - bbox[0]
-        draw.text((self.width//2 - text_width//2, self.height - 40), label, fill=(100, 100, 100), font=font_small)
+        # Anchored at its top centre, so no per-frame textbbox is needed
+        label = f"Rhubarb Shape: {mouth_shape}"
+        if self.show_time_label:
+            label += f" | Time: {time_sec:.2f}s"
+        draw.text((self.width//2, self.height - 40), label, fill=(100, 100, 100),
+                  font=self._font_small, anchor='ma')
         
         return img
     
+    def _get_shape_frame(self, mouth_shape: str, word: str) -> Image.Image:
+        """Background with the sprite and word title, rendered once per shape for the current word"""
+        if self._shape_frame_cache is None or self._shape_frame_cache[0] != word:
+            self._shape_frame_cache = (word, {})
+        
+        shape_frames = self._shape_frame_cache[1]
+        if mouth_shape not in shape_frames:
+            # Create background
+            img = Image.new('RGB', (self.width, self.height), color=(240, 240, 250))
+            
+            # Get sprite (resized and centred once per shape)
+            sprite_resized, (x, y) = self._get_resized_sprite(mouth_shape)
+            
+            # Paste sprite (with alpha channel)
+            img.paste(sprite_resized, (x, y), sprite_resized)
+            
+            # Word at top (drawn over the sprite, which can reach into the title area)
+            draw = ImageDraw.Draw(img)
+            word_text = f'"{word.upper()}"'
+            draw.text((self.width//2, 30), word_text, fill=(50, 50, 50), font=self._font_large, anchor='ma')
+            
+            shape_frames[mouth_shape] = img
+        return shape_frames[mouth_shape]
+    
+    def _load_fonts(self):
+        """Load the label fonts, falling back to PIL's default font"""
+        try:
+            self._font_large = ImageFont.truetype("arial.ttf", 32)
+            self._font_small = ImageFont.truetype("arial.ttf", 18)
+        except:
+            self._font_large = ImageFont.load_default()
+            self._font_small = ImageFont.load_default()
+    
+    def __getstate__(self):
+        # Font objects are not always picklable; worker processes reload them.
+        # Sprites are re-read through the per-process file cache instead of pickled.
+        state = self.__dict__.copy()
+        state.pop('_font_large', None)
+        state.pop('_font_small', None)
+        state.pop('sprites', None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._load_fonts()
+        self.sprites = self._load_sprites()
+    
+    def _get_resized_sprite(self, mouth_shape: str):
+        """Sprite scaled to 60% of the frame width and its centred position, cached per shape"""
+        if mouth_shape not in self._resized_sprites:
+            sprite = self.sprites[mouth_shape]
+            
+            # Resize sprite to fit nicely
+            sprite_width = int(self.width * 0.6)
+            sprite_height = int(sprite.height * (sprite_width / sprite.width))
+            # BILINEAR is plenty for upscales; keep LANCZOS for large downscales
+            resample = Image.Resampling.LANCZOS if sprite.width > 2 * sprite_width else Image.Resampling.BILINEAR
+            sprite_resized = sprite.resize((sprite_width, sprite_height), resample)
+            
+            # Center sprite
+            x = (self.width - sprite_width) // 2
+            y = (self.height - sprite_height) // 2
+            
+            self._resized_sprites[mouth_shape] = (sprite_resized, (x, y))
+        return self._resized_sprites[mouth_shape]
+    
     def _create_frame_generated(self, mouth_shape: str, word: str, time_sec: float) -> Image.Image:
         """Fallback: create frame with generated graphics"""
         # Use the enhanced avatar from real_rhubarb_integration
@@ -283,50 +395,98 @@ class RhubarbWithSprites:
         generator = RealRhubarbLipSync(width=self.width, height=self.height, fps=self.fps)
         return generator._create_professional_frame(mouth_shape, word, time_sec)
     
-    def _encode_video(self, frames: List[Image.Image], audio_path: str, output_path: str):
-        """Encode frames to video with audio"""
+    # Frames buffered between rendering and the ffmpeg writer thread
+    ENCODE_QUEUE_SIZE = 8
+    
+    # Audio formats that can be stream-copied into the MP4 without re-encoding
+    COPYABLE_AUDIO_EXTENSIONS = ('.m4a', '.aac', '.mp3')
+    
+    def _find_ffmpeg(self) -> str:
+        """Locate an ffmpeg binary on PATH, or the one bundled with imageio-ffmpeg"""
+        ffmpeg_path = shutil.which("ffmpeg")
+        if ffmpeg_path:
+            return ffmpeg_path
         try:
-            from moviepy.video.io.ImageSequenceClip import ImageSequenceClip
-            from moviepy.audio.io.AudioFileClip import AudioFileClip
-            
-            frame_arrays = [np.array(frame) for frame in frames]
-            clip = ImageSequenceClip(frame_arrays, fps=self.fps)
+            import imageio_ffmpeg
+            return imageio_ffmpeg.get_ffmpeg_exe()
+        except (ImportError, RuntimeError):
+            raise RuntimeError("ffmpeg not found. Install ffmpeg or run: pip install imageio-ffmpeg")
+    
+    def _encode_with_ffmpeg(self, ffmpeg_path: str, frames: Iterable[Union[Image.Image, bytes]], total_frames: int,
+                            audio_path: Optional[str], output_path: str) -> int:
+        """
+        Pipe raw RGB frames into ffmpeg's stdin and mux the audio in the same pass
+        
+        Frames may be images or their already-converted raw RGB bytes.
+        
+        Returns:
+            Number of frames written
+        """
+        cmd = [
+            ffmpeg_path, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+            '-s', f'{self.width}x{self.height}', '-r', str(self.fps),
+            '-i', '-',
+        ]
+        if audio_path:
+            cmd.extend(['-i', audio_path])
+        cmd.extend(['-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p'])
+        if audio_path:
+            if Path(audio_path).suffix.lower() in self.COPYABLE_AUDIO_EXTENSIONS:
+                cmd.extend(['-c:a', 'copy'])
+            else:
+                # Pad short audio with silence so the video length decides the clip length
+                cmd.extend(['-c:a', 'aac', '-b:a', '128k', '-af', 'apad'])
+        cmd.extend(['-t', f'{total_frames / self.fps:.3f}', output_path])
+        
+        frame_count = 0
+        with tempfile.TemporaryFile() as stderr_file:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr_file
+            )
             
-            # Add audio if available
-            audio_clip = None
-            if audio_path and os.path.exists(audio_path):
-                try:
-                    audio_clip = AudioFileClip(audio_path)
-                    clip.audio = audio_clip
-                    print(f"✅ Audio track added")
-                except Exception as e:
-                    print(f"⚠️ Could not add audio: {e}")
+            # A writer thread feeds ffmpeg while the next frames are rendered
+            frame_queue = queue.Queue(maxsize=self.ENCODE_QUEUE_SIZE)
+            pipe_closed = threading.Event()
             
-            print(f"\n📹 Encoding video...")
-            clip.write_videofile(
-                output_path,
-                codec='libx264',
-                audio_codec='aac' if audio_clip else None,
-                preset='ultrafast',
-                ffmpeg_params=['-pix_fmt', 'yuv420p'],
-                logger=None
-            )
+            def write_frames():
+                while True:
+                    data = frame_queue.get()
+                    if data is None:
+                        return
+                    if not pipe_closed.is_set():
+                        try:
+                            proc.stdin.write(data)
+                        except BrokenPipeError:
+                            pipe_closed.set()
             
-            # Close clips
-            clip.close()
-            if audio_path and os.path.exists(audio_path):
+            writer = threading.Thread(target=write_frames, daemon=True)
+            writer.start()
+            try:
+                for frame in frames:
+                    if pipe_closed.is_set():
+                        break
+                    # tobytes() copies the (possibly reused) frame, so it can be queued
+                    frame_queue.put(frame if isinstance(frame, bytes) else frame.tobytes())
+                    frame_count += 1
+            finally:
+                frame_queue.put(None)
+                writer.join()
                 try:
-                    audio_clip.close()
-                except:
+                    proc.stdin.close()
+                except BrokenPipeError:
                     pass
+                returncode = proc.wait()
             
-            print(f"\n✅ Video saved: {output_path}")
-            print(f"✅ Using: {'Sprite images' if self.sprites else 'Generated graphics'}")
-            print(f"✅ Audio: {'Embedded' if (audio_path and os.path.exists(audio_path)) else 'None'}")
-            print(f"{'='*70}\n")
-            
-        except ImportError:
-            raise RuntimeError("moviepy not installed")
+            if returncode != 0:
+                stderr_file.seek(0)
+                error = stderr_file.read().decode(errors='replace').strip()
+                raise RuntimeError(f"ffmpeg failed: {error}")
+        
+        return frame_count
     
     def _create_fallback_timing(self, word: str) -> Dict:
         """Create fallback timing"""
@@ -337,6 +497,61 @@ class RhubarbWithSprites:
         }
 
 
+@functools.lru_cache(maxsize=4)
+def _load_sprite_files(sprites_dir: str) -> Dict[str, bytes]:
+    """
+    Read the encoded sprite image for each mouth shape
+    
+    Cached per directory, so each process reads the files at most once.
+    
+    Args:
+        sprites_dir: Directory containing mouth shape images
+        
+    Returns:
+        Dict of shape -> encoded image bytes
+    """
+    sprite_files = {}
+    
+    # Try different naming conventions
+    for shape in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'X']:
+        possible_names = [
+            f"{shape}.png",
+            f"mouth_{shape}.png",
+            f"mouth-{shape}.png",
+            f"{shape.lower()}.png",
+            f"lisa-{shape}.png",  # Lisa character sprites
+            f"character-{shape}.png",
+            f"avatar-{shape}.png",
+        ]
+        
+        for name in possible_names:
+            sprite_path = os.path.join(sprites_dir, name)
+            if os.path.exists(sprite_path):
+                try:
+                    with open(sprite_path, 'rb') as f:
+                        data = f.read()
+                    Image.open(BytesIO(data)).verify()
+                    sprite_files[shape] = data
+                    print(f"  ✅ Loaded sprite: {shape} ({name})")
+                    break
+                except Exception as e:
+                    print(f"  ⚠️ Failed to load {name}: {e}")
+    
+    return sprite_files
+
+
+# Per-process state for frame rendering workers
+_worker_renderer = None
+
+def _init_frame_worker(renderer: RhubarbWithSprites):
+    global _worker_renderer
+    _worker_renderer = renderer
+
+def _render_frame_worker(task) -> Image.Image:
+    # Copy out of the worker's reused frame before the result is queued
+    return _worker_renderer._render_frame(*task).copy()
+
+
 # Singleton
 _instance = None
 
@@ -18,9 +18,13 @@ Features:
 import os
 import sys
 import json
+import hashlib
+import shutil
 import subprocess
+import tempfile
+import time
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Set
 import librosa
 import numpy as np
 from pydub import AudioSegment
@@ -38,11 +42,21 @@ class ShortPhraseLipSync:
     BEST accuracy for therapy applications
     """
     
+    # Recognizers we know how to ask Rhubarb for
+    RECOGNIZERS = ("pocketSphinx", "phonetic")
+    
+    # Rhubarb path -> recognizers it supports (shared by all instances)
+    _RECOGNIZER_CACHE = {}
+    
+    # Rhubarb alignments keyed by audio content hash + language
+    CACHE_DIR = os.path.join(tempfile.gettempdir(), "phrase_lip_sync_cache")
+    
     def __init__(self):
         """Initialize short phrase lip sync with romanizers"""
         self.rhubarb_path = r"C:\Users\Shafiqha\Downloads\Rhubarb-Lip-Sync-1.13.0-Windows\Rhubarb-Lip-Sync-1.13.0-Windows\rhubarb.exe"
         self.hindi_romanizer = get_hindi_romanizer()
         self.kannada_romanizer = get_kannada_romanizer()
+        self.recognizers = self._probe_recognizers()
         print(f"✅ Short Phrase Lip Sync initialized")
         print(f"   🎯 OPTIMIZED FOR: 2-3 word phrases")
         print(f"   📊 Accuracy: EN 95-98% | HI/KN 90-95%")
@@ -84,6 +98,14 @@ class ShortPhraseLipSync:
                 phrase = self.kannada_romanizer.romanize(phrase)
                 print(f"🔤 Kannada Romanized: {original_phrase} → {phrase}")
             
+            # Reuse the Rhubarb result for audio we have already aligned
+            cache_key = self._audio_cache_key(audio_path, language)
+            cached_json = os.path.join(self.CACHE_DIR, f"{cache_key}.json")
+            if os.path.exists(cached_json):
+                alignment_data = self._read_json(cached_json)
+                print(f"⚡ Using cached alignment ({cache_key[:10]})")
+                return self._finish_phrase_alignment(alignment_data, audio_path, phrase)
+            
             # Convert to WAV if needed
             wav_path = audio_path
             if not audio_path.endswith('.wav'):
@@ -101,91 +123,29 @@ class ShortPhraseLipSync:
             
             if language == 'en':
                 # ENGLISH: PocketSphinx FIRST for maximum accuracy
-                print(f"🔄 Step 1: POCKETSPHINX recognizer (95-98% accuracy for English)...")
+                print(f"🔄 POCKETSPHINX recognizer (95-98% accuracy for English)")
                 print(f"   Best for English short phrases!")
-                
-                cmd_pocketsphinx = [
-                    self.rhubarb_path,
-                    "-f", "json",
-                    wav_path,
-                    "-o", output_json,
-                    "--extendedShapes", "GHX",
-                    "--recognizer", "pocketSphinx"
-                ]
-                
-                result = subprocess.run(cmd_pocketsphinx, capture_output=True, timeout=60)
-                
-                if result.returncode != 0:
-                    print(f"⚠️ PocketSphinx failed, trying Phonetic...")
-                    print(f"🔄 Step 2: PHONETIC recognizer (90-95% accuracy)...")
-                    
-                    cmd_phonetic = [
-                        self.rhubarb_path,
-                        "-f", "json",
-                        wav_path,
-                        "-o", output_json,
-                        "--extendedShapes", "GHX",
-                        "--recognizer", "phonetic"
-                    ]
-                    
-                    result = subprocess.run(cmd_phonetic, capture_output=True, timeout=60)
-                    
-                    if result.returncode != 0:
-                        print(f"🔄 Step 3: NO RECOGNIZER (fallback)...")
-                        cmd_no_recognizer = [
-                            self.rhubarb_path,
-                            "-f", "json",
-                            wav_path,
-                            "-o", output_json,
-                            "--extendedShapes", "GHX"
-                        ]
-                        result = subprocess.run(cmd_no_recognizer, capture_output=True, timeout=60)
-            
+                print(f"   Fallbacks: PHONETIC (90-95%) → NO RECOGNIZER, started in parallel")
+                recognizers = ["pocketSphinx", "phonetic", None]
             else:
                 # HINDI/KANNADA: Phonetic with ROMANIZED text (best for multilingual)
-                print(f"🔄 Step 1: PHONETIC recognizer with ROMANIZED text (90-95% accuracy)...")
+                print(f"🔄 PHONETIC recognizer with ROMANIZED text (90-95% accuracy)")
                 print(f"   Romanized {language.upper()} text helps phonetic recognition!")
-                
-                cmd_phonetic = [
-                    self.rhubarb_path,
-                    "-f", "json",
-                    wav_path,
-                    "-o", output_json,
-                    "--extendedShapes", "GHX",
-                    "--recognizer", "phonetic"
-                ]
-                
-                result = subprocess.run(cmd_phonetic, capture_output=True, timeout=60)
-                
-                if result.returncode != 0:
-                    print(f"🔄 Step 2: NO RECOGNIZER (fallback)...")
-                    cmd_no_recognizer = [
-                        self.rhubarb_path,
-                        "-f", "json",
-                        wav_path,
-                        "-o", output_json,
-                        "--extendedShapes", "GHX"
-                    ]
-                    result = subprocess.run(cmd_no_recognizer, capture_output=True, timeout=60)
+                print(f"   Fallback: NO RECOGNIZER, started in parallel")
+                recognizers = ["phonetic", None]
+            
+            result = self._run_rhubarb_chain(wav_path, output_json, recognizers)
             
             if result.returncode == 0 and os.path.exists(output_json):
-                with open(output_json, 'r', encoding='utf-8') as f:
-                    alignment_data = json.load(f)
-                
-                # Enhance with audio analysis
-                enhanced_data = self._enhance_phrase_alignment(
-                    alignment_data,
-                    audio_path,
-                    phrase
-                )
+                alignment_data = self._read_json(output_json)
                 
-                print(f"✅ Phrase lip sync complete!")
-                print(f"   Duration: {enhanced_data['metadata']['duration']:.2f}s")
-                print(f"   Mouth cues: {len(enhanced_data['mouthCues'])}")
+                try:
+                    os.makedirs(self.CACHE_DIR, exist_ok=True)
+                    shutil.copyfile(output_json, cached_json)
+                except OSError as e:
+                    print(f"⚠️ Could not cache alignment: {e}")
                 
-                print(f"{'='*70}\n")
-                
-                return enhanced_data
+                return self._finish_phrase_alignment(alignment_data, audio_path, phrase)
             else:
                 error_msg = result.stderr.decode('utf-8', errors='ignore') if result.stderr else "Unknown error"
                 print(f"❌ Phrase alignment failed: {error_msg}")
@@ -197,6 +157,182 @@ class ShortPhraseLipSync:
             traceback.print_exc()
             return None
     
+    def _probe_recognizers(self) -> Optional[Set[str]]:
+        """
+        Ask Rhubarb once which recognizers it supports
+        
+        Returns:
+            Set of recognizer names, or None if Rhubarb could not be probed
+        """
+        if self.rhubarb_path not in self._RECOGNIZER_CACHE:
+            try:
+                result = subprocess.run([self.rhubarb_path, "--help"], capture_output=True, text=True, timeout=10)
+                help_text = result.stdout + result.stderr
+                self._RECOGNIZER_CACHE[self.rhubarb_path] = {
+                    name for name in self.RECOGNIZERS if name in help_text
+                } if result.returncode == 0 else None
+            except Exception:
+                self._RECOGNIZER_CACHE[self.rhubarb_path] = None
+        return self._RECOGNIZER_CACHE[self.rhubarb_path]
+    
+    def _rhubarb_cmd(self, wav_path: str, output_json: str, recognizer: Optional[str] = None) -> List[str]:
+        """Rhubarb command line for one recognizer (None omits --recognizer)"""
+        cmd = [
+            self.rhubarb_path,
+            "-f", "json",
+            wav_path,
+            "-o", output_json,
+            "--extendedShapes", "GHX"
+        ]
+        if recognizer:
+            cmd += ["--recognizer", recognizer]
+        return cmd
+    
+    def _run_rhubarb_chain(self, wav_path: str, output_json: str,
+                           recognizers: List[Optional[str]], timeout: float = 60):
+        """
+        Run Rhubarb with a preference-ordered list of recognizers
+        
+        All attempts start at once, each writing its own JSON. Results are
+        taken in preference order: the first recognizer that succeeds wins
+        and the rest are killed, so a failing recognizer no longer delays
+        its fallbacks.
+        
+        Args:
+            wav_path: WAV file to align
+            output_json: Where the winning JSON is written
+            recognizers: Recognizer names in order of preference (None = no recognizer)
+            timeout: Seconds allowed for the whole chain
+            
+        Returns:
+            subprocess.CompletedProcess of the winning (or last) attempt
+        """
+        attempts = []
+        result = subprocess.CompletedProcess([self.rhubarb_path], 1, None, b"No recognizer available")
+        try:
+            for recognizer in recognizers:
+                if recognizer and self.recognizers is not None and recognizer not in self.recognizers:
+                    print(f"   ⏭️ {recognizer} not available in this Rhubarb build")
+                    continue
+                
+                attempt_json = output_json.replace('.json', f"_{recognizer or 'default'}.json")
+                cmd = self._rhubarb_cmd(wav_path, attempt_json, recognizer)
+                # Rhubarb writes the JSON to a file; only stderr matters, on failure
+                proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+                attempts.append((recognizer, attempt_json, cmd, proc))
+            
+            deadline = time.monotonic() + timeout
+            for recognizer, attempt_json, cmd, proc in attempts:
+                try:
+                    _, stderr = proc.communicate(timeout=max(deadline - time.monotonic(), 0))
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    _, stderr = proc.communicate()
+                    print(f"⚠️ {recognizer or 'Default recognizer'} timed out")
+                    result = subprocess.CompletedProcess(cmd, 1, None, stderr)
+                    continue
+                
+                result = subprocess.CompletedProcess(cmd, proc.returncode, None, stderr)
+                if proc.returncode == 0 and os.path.exists(attempt_json):
+                    os.replace(attempt_json, output_json)
+                    print(f"✅ Aligned with {recognizer or 'no recognizer'}")
+                    return result
+                
+                print(f"⚠️ {recognizer or 'Default recognizer'} failed, using next fallback...")
+                
+                # Remember recognizers Rhubarb rejects so later phrases skip them
+                error_text = stderr.decode('utf-8', errors='ignore').lower()
+                if recognizer and recognizer.lower() in error_text and ('invalid' in error_text or 'no such' in error_text):
+                    if self.recognizers is not None:
+                        self.recognizers.discard(recognizer)
+            
+            return result
+        finally:
+            for recognizer, attempt_json, cmd, proc in attempts:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+                if os.path.exists(attempt_json):
+                    os.remove(attempt_json)
+    
+    def _read_json(self, path: str) -> Dict:
+        """Parse a Rhubarb JSON file from raw bytes, with orjson when installed"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            import orjson
+            return orjson.loads(data)
+        except ImportError:
+            return json.loads(data)
+    
+    def _finish_phrase_alignment(self, alignment_data: Dict, audio_path: str, phrase: str) -> Dict:
+        """Enhance Rhubarb output with audio analysis and report the result"""
+        enhanced_data = self._enhance_phrase_alignment(
+            alignment_data,
+            audio_path,
+            phrase
+        )
+        
+        print(f"✅ Phrase lip sync complete!")
+        print(f"   Duration: {enhanced_data['metadata']['duration']:.2f}s")
+        print(f"   Mouth cues: {len(enhanced_data['mouthCues'])}")
+        
+        print(f"{'='*70}\n")
+        
+        return enhanced_data
+    
+    def _audio_cache_key(self, audio_path: str, language: str) -> str:
+        """
+        Cheap content hash of an audio file for the alignment cache
+        
+        Hashes the file size plus its first and last 64KB, which is enough
+        to tell recordings apart without reading whole files.
+        
+        Args:
+            audio_path: Path to audio file
+            language: Language code (selects the recognizer chain)
+            
+        Returns:
+            Hex digest identifying this audio/language pair
+        """
+        chunk = 1 << 16
+        size = os.path.getsize(audio_path)
+        digest = hashlib.sha1(f"{language}:{size}:".encode())
+        with open(audio_path, 'rb') as f:
+            digest.update(f.read(chunk))
+            if size > chunk:
+                f.seek(max(size - chunk, chunk))
+                digest.update(f.read())
+        return digest.hexdigest()
+    
+    def _load_audio(self, audio_path: str, sr: int = 22050):
+        """
+        Load mono float32 audio at the given sample rate
+        
+        Reads straight into float32 with soundfile, skipping librosa's
+        decode + resample when the file is already at the target rate.
+        Formats soundfile cannot read fall back to librosa.load.
+        
+        Args:
+            audio_path: Path to audio file
+            sr: Target sample rate
+            
+        Returns:
+            (samples, sample_rate)
+        """
+        try:
+            import soundfile as sf
+            with sf.SoundFile(audio_path) as f:
+                file_sr = f.samplerate
+                y = f.read(dtype='float32', always_2d=True)
+        except Exception:
+            return librosa.load(audio_path, sr=sr)
+        
+        y = y.mean(axis=1) if y.shape[1] > 1 else y[:, 0]
+        if file_sr != sr:
+            y = librosa.resample(y, orig_sr=file_sr, target_sr=sr)
+        return y, sr
+    
     def _enhance_phrase_alignment(
         self,
         alignment_data: Dict,
@@ -218,7 +354,7 @@ class ShortPhraseLipSync:
             print(f"🔬 Enhancing phrase alignment...")
             
             # Load audio
-            y, sr = librosa.load(audio_path, sr=22050)
+            y, sr = self._load_audio(audio_path, sr=22050)
             
             # Detect onsets (word boundaries)
             onset_frames = librosa.onset.onset_detect(y=y, sr=sr, units='time')
@@ -231,46 +367,57 @@ class ShortPhraseLipSync:
             # Detect pauses (for word boundaries)
             energy_threshold = np.mean(energy) * 0.25
             
-            enhanced_cues = []
+            cues = alignment_data['mouthCues']
+            starts = np.array([cue['start'] for cue in cues], dtype=float)
+            ends = np.array([cue['end'] for cue in cues], dtype=float)
             
-            for i, cue in enumerate(alignment_data['mouthCues']):
-                start_time = cue['start']
-                end_time = cue['end']
-                mouth_shape = cue['value']
-                
-                # Check for onset at start
-                has_onset = any(abs(onset - start_time) < 0.08 for onset in onset_frames)
-                
-                # Get energy during this cue
-                cue_energy_mask = (times >= start_time) & (times <= end_time)
-                if cue_energy_mask.any():
-                    avg_energy = np.mean(energy[cue_energy_mask])
-                    max_energy = np.max(energy[cue_energy_mask])
-                    is_pause = avg_energy < energy_threshold
-                else:
-                    avg_energy = 0.0
-                    max_energy = 0.0
-                    is_pause = True
-                
-                # Adjust mouth shape based on energy
-                if is_pause:
-                    # Close mouth during pauses
-                    mouth_shape = 'X'
-                elif has_onset and mouth_shape == 'X':
-                    # Open mouth at word start
-                    mouth_shape = 'A'
-                elif max_energy > 0.2 and mouth_shape in ['X', 'A']:
-                    # Open more for high energy
-                    mouth_shape = 'C'
-                
-                enhanced_cues.append({
-                    'start': start_time,
-                    'end': end_time,
-                    'value': mouth_shape,
-                    'has_onset': has_onset,
+            # Check for onsets near each cue start in one pass
+            onset_frames = np.asarray(onset_frames, dtype=float)
+            if len(onset_frames) and len(cues):
+                onset_gaps = np.abs(onset_frames[:, None] - starts[None, :]).min(axis=0)
+                has_onsets = onset_gaps < 0.08
+            else:
+                has_onsets = np.zeros(len(cues), dtype=bool)
+            
+            # Energy frames inside [start, end] via binary search + cumulative sums
+            lo = np.searchsorted(times, starts, side='left')
+            hi = np.searchsorted(times, ends, side='right')
+            energy_cumsum = np.concatenate(([0.0], np.cumsum(energy, dtype=np.float64)))
+            has_energy = hi > lo
+            counts = np.maximum(hi - lo, 1)
+            avg_energies = np.where(has_energy, (energy_cumsum[hi] - energy_cumsum[lo]) / counts, 0.0)
+            max_energies = np.zeros(len(cues))
+            for i in np.flatnonzero(has_energy):
+                max_energies[i] = energy[lo[i]:hi[i]].max()
+            is_pauses = ~has_energy | (avg_energies < energy_threshold)
+            
+            # Adjust mouth shapes based on energy (first matching rule wins):
+            # close during pauses, open at word starts, open more for high energy
+            shapes = np.array([cue['value'] for cue in cues], dtype='<U1')
+            is_closed = shapes == 'X'
+            shapes = np.select(
+                [
+                    is_pauses,
+                    has_onsets & is_closed,
+                    (max_energies > 0.2) & (is_closed | (shapes == 'A'))
+                ],
+                ['X', 'A', 'C'],
+                default=shapes
+            ) if len(cues) else shapes
+            
+            enhanced_cues = [
+                {
+                    'start': cue['start'],
+                    'end': cue['end'],
+                    'value': str(shape),
+                    'has_onset': bool(has_onset),
                     'energy': float(avg_energy),
-                    'is_pause': is_pause
-                })
+                    'is_pause': bool(is_pause)
+                }
+                for cue, shape, has_onset, avg_energy, is_pause in zip(
+                    cues, shapes, has_onsets, avg_energies, is_pauses
+                )
+            ]
             
             alignment_data['mouthCues'] = enhanced_cues
             
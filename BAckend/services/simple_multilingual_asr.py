@@ -4,14 +4,23 @@ Fallback transcription service for lip animation exercise
 """
 
 import os
+import re
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
 from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
 
 try:
     import torch
     import torchaudio
     from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
     TRANSFORMERS_AVAILABLE = True
+    DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 except ImportError:
     TRANSFORMERS_AVAILABLE = False
 
@@ -22,6 +31,341 @@ except ImportError:
     LIBROSA_AVAILABLE = False
 
 
+# Transcription cleanup tables (built once)
+_SPECIAL_TOKENS = re.compile(r"<pad>|<unk>|</?s>")
+_WORD_DELIMITER = str.maketrans({"|": " "})
+_KANNADA_CLEANUP = str.maketrans({
+    "|": " ",
+    "\u200b": "",  # Zero-width space
+    "\u200c": "",  # Zero-width non-joiner
+    "\u200d": "",  # Zero-width joiner
+})
+
+# Kannada candidate that loaded successfully (probed once per process)
+_KANNADA_RESOLVED = None
+
+# Per-thread pinned host buffer for CUDA input uploads
+_PINNED = threading.local()
+
+
+@lru_cache(maxsize=4)
+def _load_asr(model_name: str):
+    """
+    Load a Wav2Vec2 processor and model once per process
+    
+    Args:
+        model_name: Hugging Face model id
+        
+    Returns:
+        (processor, model); the model is in eval mode on DEVICE, or an
+        ONNX Runtime wrapper with the same call signature
+    """
+    print(f"📥 Loading model: {model_name}")
+    processor = Wav2Vec2Processor.from_pretrained(model_name)
+    model = Wav2Vec2ForCTC.from_pretrained(model_name).eval()
+    
+    if DEVICE == "cuda":
+        # Runs under fp16 autocast in _forward
+        model = model.to(DEVICE)
+    else:
+        # Prefer ONNX Runtime on CPU when it is installed
+        session = _load_onnx_session(model, model_name)
+        if session is not None:
+            return processor, session
+        
+        # int8 weights for the Linear layers, which dominate CPU time
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        print(f"⚡ Linear layers quantized to int8")
+    
+    return processor, _compile_model(model)
+
+
+class _OnnxWav2Vec2:
+    """ONNX Runtime session callable like Wav2Vec2ForCTC (returns .logits)"""
+    
+    def __init__(self, session):
+        self.session = session
+    
+    def __call__(self, input_values):
+        logits = self.session.run(['logits'], {'input_values': input_values.cpu().numpy()})[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+
+def _load_onnx_session(model, model_name: str):
+    """
+    Export the model to ONNX once and open it with ONNX Runtime
+    
+    The export is cached under ~/.cache/asr, so later processes only
+    open the session.
+    
+    Args:
+        model: Wav2Vec2ForCTC in eval mode (float32, CPU)
+        model_name: Hugging Face model id (names the cached file)
+        
+    Returns:
+        _OnnxWav2Vec2, or None if onnxruntime is missing or the export fails
+    """
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return None
+    
+    onnx_path = Path.home() / ".cache" / "asr" / f"{model_name.replace('/', '__')}.onnx"
+    try:
+        if not onnx_path.exists():
+            print(f"📦 Exporting {model_name} to ONNX...")
+            onnx_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            class LogitsOnly(torch.nn.Module):
+                def __init__(self, ctc_model):
+                    super().__init__()
+                    self.ctc_model = ctc_model
+                
+                def forward(self, input_values):
+                    return self.ctc_model(input_values).logits
+            
+            tmp_path = onnx_path.with_suffix(".onnx.tmp")
+            torch.onnx.export(
+                LogitsOnly(model), (torch.zeros(1, 16000),), str(tmp_path),
+                input_names=['input_values'], output_names=['logits'],
+                dynamic_axes={'input_values': {1: 'T'}, 'logits': {1: 'T'}},
+                opset_version=17
+            )
+            os.replace(tmp_path, onnx_path)
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = os.cpu_count()
+        session = ort.InferenceSession(str(onnx_path), sess_options=options,
+                                       providers=['CPUExecutionProvider'])
+        print(f"⚡ Using ONNX Runtime: {onnx_path.name}")
+        return _OnnxWav2Vec2(session)
+    except Exception as e:
+        print(f"⚠️ ONNX Runtime unavailable, using PyTorch: {str(e)[:100]}")
+        return None
+
+
+def _forward(model, input_values):
+    """
+    Run the CTC forward pass on DEVICE
+    
+    Args:
+        model: Model from _load_asr
+        input_values: Processor output tensor
+        
+    Returns:
+        float32 logits on the CPU
+    """
+    if DEVICE == "cuda":
+        input_values = _upload_pinned(input_values)
+    else:
+        input_values = input_values.to(DEVICE)
+    autocast = torch.autocast("cuda", dtype=torch.float16) if DEVICE == "cuda" else nullcontext()
+    with torch.inference_mode(), autocast:
+        return model(input_values).logits.float().cpu()
+
+
+def _upload_pinned(input_values):
+    """
+    Copy CPU input to the GPU through a reused page-locked staging buffer
+    
+    Pinned memory lets the host-to-device copy run asynchronously, and
+    keeping one buffer per thread (grown as needed) avoids a page-locked
+    allocation on every call. The buffer is only rewritten after the
+    previous forward has synchronised on its .cpu() result.
+    
+    Args:
+        input_values: Processor output tensor
+        
+    Returns:
+        Tensor on DEVICE
+    """
+    size = input_values.numel()
+    buffer = getattr(_PINNED, "buffer", None)
+    if buffer is None or buffer.numel() < size:
+        buffer = torch.empty(size, dtype=torch.float32, pin_memory=True)
+        _PINNED.buffer = buffer
+    
+    staged = buffer[:size].view(input_values.shape)
+    staged.copy_(input_values)
+    return staged.to(DEVICE, non_blocking=True)
+
+
+def _compile_model(model):
+    """
+    Compile the model forward with torch.compile when the platform supports it
+    
+    Shapes are left dynamic rather than padded to fixed buckets: the base
+    English model has no attention mask, so zero padding would change its
+    output. A warm-up forward absorbs the compile cost at load time; if it
+    fails, the eager model is used.
+    
+    Args:
+        model: Wav2Vec2ForCTC in eval mode
+        
+    Returns:
+        Compiled model, or the original one
+    """
+    if not hasattr(torch, "compile") or sys.platform == "win32":
+        return model
+    
+    try:
+        compiled = torch.compile(model, dynamic=True)
+        _forward(compiled, torch.zeros(1, 16000))
+        print(f"⚡ Model compiled with torch.compile")
+        return compiled
+    except Exception as e:
+        print(f"⚠️ torch.compile unavailable, using eager model: {str(e)[:100]}")
+        return model
+
+
+def _load_audio(audio_path: str, sr: int = 16000):
+    """
+    Load mono float32 audio at the given sample rate
+    
+    Reads PCM/FLAC/OGG directly with soundfile and resamples with
+    torchaudio only when needed; other codecs go through librosa.
+    
+    Args:
+        audio_path: Path to audio file
+        sr: Target sample rate
+        
+    Returns:
+        (samples, sample_rate)
+    """
+    try:
+        import soundfile as sf
+        audio, file_sr = sf.read(audio_path, dtype='float32', always_2d=False)
+    except Exception:
+        return librosa.load(audio_path, sr=sr)
+    
+    if audio.ndim == 2:
+        audio = audio.mean(axis=1)
+    if file_sr != sr:
+        audio = torchaudio.functional.resample(torch.from_numpy(audio), file_sr, sr).numpy()
+    return audio, sr
+
+
+def _trim_silence(audio, top_db: float = 20, frame_length: int = 2048, hop_length: int = 512):
+    """
+    Strip leading and trailing silence, as librosa.effects.trim does
+    
+    Frame energies come from one cumulative sum over the zero-padded
+    (centred) signal instead of framing it, so the cost is one pass.
+    
+    Returns:
+        (trimmed audio, [start, end] sample indices)
+    """
+    pad = frame_length // 2
+    squared = np.square(audio, dtype=np.float64)
+    cumulative = np.concatenate(([0.0], np.cumsum(np.pad(squared, pad))))
+    starts = np.arange(1 + len(audio) // hop_length) * hop_length
+    power = (cumulative[starts + frame_length] - cumulative[starts]) / frame_length
+    
+    # Same dB test as librosa: 10*log10(power / max power) > -top_db, floored at 1e-10
+    db = 10.0 * np.log10(np.maximum(1e-10, power)) - 10.0 * np.log10(np.maximum(1e-10, power.max()))
+    nonsilent = np.flatnonzero(db > -top_db)
+    if nonsilent.size == 0:
+        return audio[0:0], np.array([0, 0])
+    
+    start = int(nonsilent[0] * hop_length)
+    end = min(len(audio), int((nonsilent[-1] + 1) * hop_length))
+    return audio[start:end], np.array([start, end])
+
+
+def _preemphasis_inplace(audio, coef: float = 0.97):
+    """
+    Pre-emphasis filter y[n] - coef * y[n-1], written into the input array
+    
+    Matches librosa.effects.preemphasis, including its linearly
+    extrapolated initial state for the first sample.
+    """
+    if len(audio) < 2:
+        return audio
+    first = 3 * audio[0] - audio[1]
+    audio[1:] -= coef * audio[:-1]
+    audio[0] = first
+    return audio
+
+
+@lru_cache(maxsize=4)
+def _ctc_vocab(processor):
+    """
+    id -> character lookup table for a CTC tokenizer (word delimiter as space)
+    
+    Returns:
+        (object array of characters, pad/blank token id)
+    """
+    tokenizer = processor.tokenizer
+    tokens = tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))
+    delimiter = getattr(tokenizer, "word_delimiter_token", None)
+    chars = np.array([" " if token == delimiter else token for token in tokens], dtype=object)
+    return chars, tokenizer.pad_token_id
+
+
+def _greedy_ctc_decode(processor, predicted_ids) -> str:
+    """
+    Collapse repeated ids, drop blanks and join characters, like batch_decode
+    
+    Args:
+        processor: Wav2Vec2Processor of the model
+        predicted_ids: argmax ids, shape (1, T)
+        
+    Returns:
+        Decoded text for the first (only) item
+    """
+    chars, pad_id = _ctc_vocab(processor)
+    ids = predicted_ids[0].cpu().numpy()
+    if len(ids) == 0:
+        return ""
+    
+    keep = np.empty(len(ids), dtype=bool)
+    keep[0] = True
+    np.not_equal(ids[1:], ids[:-1], out=keep[1:])
+    ids = ids[keep]
+    ids = ids[ids != pad_id]
+    
+    text = "".join(chars[ids]).strip()
+    if processor.tokenizer.clean_up_tokenization_spaces:
+        text = processor.tokenizer.clean_up_tokenization(text)
+    return text
+
+
+def _has_model_config(model_name: str) -> bool:
+    """Check that a Hugging Face model exists by fetching only its config.json"""
+    try:
+        from huggingface_hub import hf_hub_download
+        hf_hub_download(model_name, "config.json")
+        return True
+    except Exception:
+        return False
+
+
+def _available_models(candidates: list) -> list:
+    """
+    Filter model candidates down to those that exist, preserving order
+    
+    All candidates are checked concurrently with a cheap config.json
+    fetch, so missing models no longer cost a failed full download each.
+    
+    Args:
+        candidates: Hugging Face model ids in order of preference
+        
+    Returns:
+        Candidates whose config could be fetched (all of them if none could)
+    """
+    with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+        found = list(executor.map(_has_model_config, candidates))
+    
+    available = [name for name, ok in zip(candidates, found) if ok]
+    for name, ok in zip(candidates, found):
+        if not ok:
+            print(f"⏭️ Skipping unavailable model: {name}")
+    
+    # Offline or hub unreachable: fall back to trying every candidate
+    return available or list(candidates)
+
+
 def transcribe_multilingual(audio_path: str, language: str = "en") -> str:
     """
     Transcribe audio file to text using language-specific Wav2Vec2 models
@@ -33,26 +377,29 @@ def transcribe_multilingual(audio_path: str, language: str = "en") -> str:
     Returns:
         Transcribed text
     """
+    global _KANNADA_RESOLVED
+    
     if not TRANSFORMERS_AVAILABLE or not LIBROSA_AVAILABLE:
         print("⚠️ ASR libraries not available")
         return ""
     
     try:
         # Load audio
-        audio, sr = librosa.load(audio_path, sr=16000)
+        audio, sr = _load_audio(audio_path, sr=16000)
         
         # Enhanced audio preprocessing for better recognition
         if len(audio) > 0:
             # Remove silence from start and end
-            audio, _ = librosa.effects.trim(audio, top_db=20)
+            audio, _ = _trim_silence(audio, top_db=20)
             
-            # Normalize audio
-            max_val = max(abs(audio.max()), abs(audio.min()))
+            # Normalize audio (in place, one pass for the peak)
+            audio = np.ascontiguousarray(audio, dtype=np.float32)
+            max_val = np.abs(audio).max()
             if max_val > 0:
-                audio = audio / max_val * 0.95  # Normalize to 95% to avoid clipping
+                audio *= 0.95 / max_val  # Normalize to 95% to avoid clipping
             
             # Apply pre-emphasis to boost high frequencies (improves consonant recognition)
-            audio = librosa.effects.preemphasis(audio, coef=0.97)
+            _preemphasis_inplace(audio, coef=0.97)
         
         print(f"🎵 Audio loaded: {len(audio)} samples, {len(audio)/sr:.2f}s")
         
@@ -75,17 +422,22 @@ def transcribe_multilingual(audio_path: str, language: str = "en") -> str:
                 "facebook/wav2vec2-large-xlsr-53"                    # XLSR multilingual
             ]
             
-            for candidate in kannada_models:
-                try:
-                    print(f"🔍 Trying Kannada model: {candidate}")
-                    processor = Wav2Vec2Processor.from_pretrained(candidate)
-                    model = Wav2Vec2ForCTC.from_pretrained(candidate)
-                    model_name = candidate
-                    print(f"✅ Loaded Kannada model: {candidate}")
-                    break
-                except Exception as e:
-                    print(f"⚠️ Failed to load {candidate}: {str(e)[:100]}")
-                    continue
+            if _KANNADA_RESOLVED:
+                # Already probed in this process
+                model_name = _KANNADA_RESOLVED
+                print(f"🇮🇳 Using Kannada model: {model_name}")
+            else:
+                for candidate in _available_models(kannada_models):
+                    try:
+                        print(f"🔍 Trying Kannada model: {candidate}")
+                        processor, model = _load_asr(candidate)
+                        model_name = candidate
+                        _KANNADA_RESOLVED = candidate
+                        print(f"✅ Loaded Kannada model: {candidate}")
+                        break
+                    except Exception as e:
+                        print(f"⚠️ Failed to load {candidate}: {str(e)[:100]}")
+                        continue
             
             if not model_name:
                 print("⚠️ No Kannada-specific model available, using multilingual")
@@ -96,11 +448,9 @@ def transcribe_multilingual(audio_path: str, language: str = "en") -> str:
             model_name = "facebook/wav2vec2-base-960h"
             print(f"🇬🇧 Using English model: {model_name}")
         
-        # Load model and processor if not already loaded (for non-Kannada or if Kannada loop failed)
+        # Get model and processor if not already loaded (cached after the first call)
         if processor is None or model is None:
-            print(f"📥 Loading model: {model_name}")
-            processor = Wav2Vec2Processor.from_pretrained(model_name)
-            model = Wav2Vec2ForCTC.from_pretrained(model_name)
+            processor, model = _load_asr(model_name)
         
         # Process audio with the model
         input_values = processor(audio, sampling_rate=16000, return_tensors="pt", padding=True).input_values
@@ -108,8 +458,7 @@ def transcribe_multilingual(audio_path: str, language: str = "en") -> str:
         print(f"📊 Input shape: {input_values.shape}")
         
         # Get predictions
-        with torch.no_grad():
-            logits = model(input_values).logits
+        logits = _forward(model, input_values)
         
         print(f"📈 Logits shape: {logits.shape}")
         
@@ -132,30 +481,20 @@ def transcribe_multilingual(audio_path: str, language: str = "en") -> str:
                 transcription = transcription_clean
                 print(f"✅ Using clean decode")
         else:
-            # For other languages, use standard decoding
-            transcription = processor.batch_decode(predicted_ids)[0]
+            # For other languages, greedy CTC decode in NumPy
+            transcription = _greedy_ctc_decode(processor, predicted_ids)
         
         print(f"📝 Raw transcription: '{transcription}'")
         
         # Language-specific post-processing
         if language == "kn":
-            # Kannada-specific cleaning and normalization
-            transcription = transcription.strip()
-            
-            # Remove word delimiters and special tokens
-            transcription = transcription.replace("|", " ")
-            transcription = transcription.replace("<s>", "").replace("</s>", "")
-            transcription = transcription.replace("<pad>", "").replace("<unk>", "")
-            
-            # Remove extra spaces
+            # Kannada-specific cleaning and normalization:
+            # remove special tokens, then word delimiters and zero-width
+            # characters in one translate pass, then extra spaces
+            transcription = _SPECIAL_TOKENS.sub("", transcription)
+            transcription = transcription.translate(_KANNADA_CLEANUP)
             transcription = " ".join(transcription.split())
             
-            # Normalize Kannada characters (handle different Unicode representations)
-            # Remove zero-width characters that might interfere
-            transcription = transcription.replace("\u200b", "")  # Zero-width space
-            transcription = transcription.replace("\u200c", "")  # Zero-width non-joiner
-            transcription = transcription.replace("\u200d", "")  # Zero-width joiner
-            
             # Common Kannada transcription fixes
             # Fix common model mistakes
             kannada_fixes = {
@@ -172,9 +511,7 @@ def transcribe_multilingual(audio_path: str, language: str = "en") -> str:
             
         elif language == "hi":
             # Hindi-specific cleaning
-            transcription = transcription.strip()
-            transcription = " ".join(transcription.split())
-            transcription = transcription.replace("|", " ").strip()
+            transcription = " ".join(transcription.translate(_WORD_DELIMITER).split())
             print(f"✅ Hindi transcription: '{transcription}'")
         else:
             # English cleaning
@@ -1,13 +1,19 @@
 """
 Simple Working Video Generator
-Generates browser-compatible MP4 videos using PIL and moviepy
+Generates browser-compatible MP4 videos using PIL and ffmpeg
 NO OPENCV - NO CODEC ISSUES
 """
 
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from .phoneme_viseme_mapper import get_phoneme_viseme_mapper
 
 class SimpleWorkingVideo:
@@ -45,14 +51,43 @@ class SimpleWorkingVideo:
         'w': 'X', 'r': 'X', 'ʊ': 'X', 'u': 'X', 'oʊ': 'X', 'o': 'X',
     }
     
+    # Transparent tile every mouth shape is baked into, centred on the mouth
+    MOUTH_SPRITE_SIZE = (100, 70)
+    
+    # Distinct frames needed before rendering moves to a process pool
+    PARALLEL_MIN_FRAMES = 24
+    
     def __init__(self, width: int = 800, height: int = 600, fps: int = 30):
         self.width = width
         self.height = height
         self.fps = fps
         self.mapper = get_phoneme_viseme_mapper()
+        self._face_base = self._build_face_base()
+        self._mouth_sprites = self._bake_mouth_sprites()
+        self._load_fonts()
+        self._label_sprites = {}
+    
+    def _load_fonts(self):
+        """Load the label font, falling back to PIL's default font"""
+        try:
+            self._font_small = ImageFont.truetype("arial.ttf", 18)
+        except:
+            self._font_small = ImageFont.load_default()
+    
+    def __getstate__(self):
+        # Workers only draw frames; the mapper stays in the parent process.
+        # Font objects are not always picklable; worker processes reload them.
+        state = self.__dict__.copy()
+        state.pop('mapper', None)
+        state.pop('_font_small', None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._load_fonts()
     
     def generate_animation(self, word: str, language: str, output_path: str) -> str:
-        """Generate video animation using PIL and moviepy"""
+        """Generate video animation using PIL, streamed into ffmpeg"""
         
         print(f"\n{'='*60}")
         print(f"🎬 GENERATING BROWSER-COMPATIBLE VIDEO")
@@ -62,65 +97,115 @@ class SimpleWorkingVideo:
         print(f"Output: {output_path}")
         
         # Get phoneme data
-        viseme_data = self.mapper.word_to_visemes(word, language)
+        viseme_data = _cached_visemes(self.mapper, word, language)
         visemes = viseme_data['visemes']
         
         print(f"Phonemes: {len(visemes)}")
         print(f"Duration: {viseme_data['total_duration']}ms")
         
-        # Generate frames as PIL images
-        frames = []
-        for viseme_info in visemes:
-            phoneme = viseme_info['phoneme']
-            duration_ms = viseme_info['duration']
-            num_frames = max(1, int((duration_ms / 1000.0) * self.fps))
-            
-            # Get mouth shape
-            shape = self.PHONEME_TO_SHAPE.get(phoneme, 'A')
-            
-            # Create frame
-            for _ in range(num_frames):
-                frame = self._create_frame(phoneme, shape)
-                frames.append(frame)
+        # Render and encode in one pass, one frame in flight at a time
+        ffmpeg_path = self._find_ffmpeg()
+        frame_count, unique_count = self._encode_with_ffmpeg(ffmpeg_path, visemes, output_path)
         
-        print(f"Generated {len(frames)} frames")
+        print(f"Generated {frame_count} frames ({unique_count} unique)")
+        print(f"✅ Video saved: {output_path}")
+        print(f"✅ Codec: H.264 (browser-compatible)")
+        print(f"{'='*60}\n")
         
-        # Save as video using moviepy
+        return output_path
+    
+    def _frame_schedule(self, visemes: List[Dict]) -> Tuple[List[Tuple[str, str]], np.ndarray]:
+        """
+        Distinct (phoneme, shape) keys and the key index of every output frame
+        
+        Each viseme lasts max(1, int(duration_s * fps)) frames; the counts are
+        computed for all visemes at once and expanded with np.repeat.
+        """
+        # Get mouth shape
+        keys = [(v['phoneme'], self.PHONEME_TO_SHAPE.get(v['phoneme'], 'A')) for v in visemes]
+        unique = list(dict.fromkeys(keys))
+        key_index = {key: i for i, key in enumerate(unique)}
+        
+        durations_ms = np.fromiter((v['duration'] for v in visemes), dtype=np.float64, count=len(visemes))
+        counts = np.maximum(1, (durations_ms / 1000.0 * self.fps).astype(np.int64))
+        indices = np.fromiter((key_index[key] for key in keys), dtype=np.intp, count=len(keys))
+        
+        return unique, np.repeat(indices, counts)
+    
+    def _render_unique_frames(self, unique: List[Tuple[str, str]]) -> List[bytes]:
+        """
+        Raw RGB bytes for each distinct (phoneme, shape)
+        
+        Long utterances with many distinct frames are spread across worker
+        processes; short ones are rendered inline, where the pool start-up
+        would cost more than the drawing.
+        """
+        if len(unique) < self.PARALLEL_MIN_FRAMES:
+            return [self._create_frame(*key).tobytes() for key in unique]
+        
+        with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                 initializer=_init_frame_worker,
+                                 initargs=(self,)) as executor:
+            return list(executor.map(_render_frame_worker, unique))
+    
+    def _find_ffmpeg(self) -> str:
+        """Locate an ffmpeg binary on PATH, or the one bundled with imageio-ffmpeg"""
+        ffmpeg_path = shutil.which("ffmpeg")
+        if ffmpeg_path:
+            return ffmpeg_path
         try:
-            import moviepy
-            from moviepy.video.io.ImageSequenceClip import ImageSequenceClip
-            
-            # Convert PIL images to numpy arrays
-            frame_arrays = [np.array(frame) for frame in frames]
-            
-            # Create video clip
-            clip = ImageSequenceClip(frame_arrays, fps=self.fps)
-            
-            # Write video with H.264 codec
-            clip.write_videofile(
-                output_path,
-                codec='libx264',
-                audio=False,
-                preset='ultrafast',
-                ffmpeg_params=['-pix_fmt', 'yuv420p']
+            import imageio_ffmpeg
+            return imageio_ffmpeg.get_ffmpeg_exe()
+        except (ImportError, RuntimeError):
+            raise RuntimeError("ffmpeg not found. Install ffmpeg or run: pip install imageio-ffmpeg")
+    
+    def _encode_with_ffmpeg(self, ffmpeg_path: str, visemes: List[Dict], output_path: str):
+        """
+        Pipe raw RGB frames into ffmpeg's stdin as H.264
+        
+        Returns:
+            (frames written, unique frames rendered)
+        """
+        cmd = [
+            ffmpeg_path, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+            '-s', f'{self.width}x{self.height}', '-r', str(self.fps),
+            '-i', '-',
+            '-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'zerolatency',
+            '-crf', '28', '-pix_fmt', 'yuv420p',
+            output_path
+        ]
+        
+        # A frame depends only on (phoneme, shape): render each once, then
+        # write the per-frame schedule from those bytes
+        unique, schedule = self._frame_schedule(visemes)
+        frames = self._render_unique_frames(unique)
+        
+        with tempfile.TemporaryFile() as stderr_file:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr_file
             )
+            try:
+                for frame_idx in schedule.tolist():
+                    proc.stdin.write(frames[frame_idx])
+            except BrokenPipeError:
+                pass
+            finally:
+                proc.stdin.close()
+                returncode = proc.wait()
             
-            print(f"✅ Video saved: {output_path}")
-            print(f"✅ Codec: H.264 (browser-compatible)")
-            print(f"{'='*60}\n")
-            
-            return output_path
-            
-        except ImportError:
-            print("❌ moviepy not installed!")
-            print("Installing moviepy...")
-            import subprocess
-            subprocess.check_call(['pip', 'install', 'moviepy'])
-            print("✅ moviepy installed, please try again")
-            raise
+            if returncode != 0:
+                stderr_file.seek(0)
+                error = stderr_file.read().decode(errors='replace').strip()
+                raise RuntimeError(f"ffmpeg failed: {error}")
+        
+        return len(schedule), len(unique)
     
-    def _create_frame(self, phoneme: str, shape: str) -> Image.Image:
-        """Create a single frame with animated face"""
+    def _build_face_base(self) -> Image.Image:
+        """Background, face, eyes and nose; identical for every frame"""
         
         # Create image
         img = Image.new('RGB', (self.width, self.height), color=(240, 245, 250))
@@ -175,38 +260,85 @@ class SimpleWorkingVideo:
             width=1
         )
         
-        # Draw mouth based on shape
+        return img
+    
+    def _create_frame(self, phoneme: str, shape: str) -> Image.Image:
+        """Create a single frame with animated face"""
+        
+        # Start from the cached face; only the mouth and label change
+        img = self._face_base.copy()
+        
+        # Face position
+        face_x = self.width // 2
+        face_y = self.height // 2 - 50
+        
+        # Paste the pre-baked mouth for this shape
         mouth_y = face_y + 80
-        self._draw_mouth(draw, face_x, mouth_y, shape)
+        sprite = self._mouth_sprites.get(shape)
+        if sprite is not None:
+            sprite_w, sprite_h = self.MOUTH_SPRITE_SIZE
+            img.paste(sprite, (face_x - sprite_w // 2, mouth_y - sprite_h // 2), sprite)
         
-        # Draw labels
-        try:
-            font = ImageFont.truetype("arial.ttf", 24)
-            font_small = ImageFont.truetype("arial.ttf", 18)
-        except:
-            font = ImageFont.load_default()
-            font_small = ImageFont.load_default()
+        # Paste the cached label for this phoneme and shape
+        label_sprite, label_pos = self._get_label_sprite(phoneme, shape)
+        img.paste(label_sprite, label_pos)
+        
+        return img
+    
+    def _get_label_sprite(self, phoneme: str, shape: str):
+        """
+        Label box for (phoneme, shape), drawn once and cropped from the frame
+        
+        The label sits on the plain background below the face, so the crop
+        can be pasted as-is into any frame.
+        
+        Returns:
+            (RGB image, top-left paste position)
+        """
+        key = (phoneme, shape)
+        if key in self._label_sprites:
+            return self._label_sprites[key]
+        
+        img = self._face_base.copy()
+        draw = ImageDraw.Draw(img)
+        face_x = self.width // 2
         
         # Label text
         label = f"Phoneme: {phoneme} | Shape: {shape}"
         
         # Draw label background
-        bbox = draw.textbbox((0, 0), label, font=font_small)
+        bbox = draw.textbbox((0, 0), label, font=self._font_small)
         text_width = bbox[2] - bbox[0]
         text_height = bbox[3] - bbox[1]
         
         label_x = face_x - text_width // 2
         label_y = self.height - 60
         
-        draw.rectangle(
-            [label_x - 10, label_y - 5,
-             label_x + text_width + 10, label_y + text_height + 5],
-            fill=(50, 50, 50, 200)
-        )
+        box = [label_x - 10, label_y - 5,
+               label_x + text_width + 10, label_y + text_height + 5]
+        draw.rectangle(box, fill=(50, 50, 50, 200))
         
-        draw.text((label_x, label_y), label, fill=(255, 255, 255), font=font_small)
+        draw.text((label_x, label_y), label, fill=(255, 255, 255), font=self._font_small)
         
-        return img
+        # Crop to everything drawn: the box plus any glyph overhang
+        text_box = draw.textbbox((label_x, label_y), label, font=self._font_small)
+        left = max(0, min(box[0], text_box[0]))
+        top = max(0, min(box[1], text_box[1]))
+        right = min(self.width, max(box[2] + 1, text_box[2]))
+        bottom = min(self.height, max(box[3] + 1, text_box[3]))
+        
+        self._label_sprites[key] = (img.crop((left, top, right, bottom)), (left, top))
+        return self._label_sprites[key]
+    
+    def _bake_mouth_sprites(self) -> Dict[str, Image.Image]:
+        """Draw each mouth shape once onto a transparent tile for pasting"""
+        sprite_w, sprite_h = self.MOUTH_SPRITE_SIZE
+        sprites = {}
+        for shape in set(self.PHONEME_TO_SHAPE.values()):
+            sprite = Image.new('RGBA', self.MOUTH_SPRITE_SIZE, (0, 0, 0, 0))
+            self._draw_mouth(ImageDraw.Draw(sprite), sprite_w // 2, sprite_h // 2, shape)
+            sprites[shape] = sprite
+        return sprites
     
     def _draw_mouth(self, draw: ImageDraw.Draw, x: int, y: int, shape: str):
         """Draw mouth shape"""
@@ -255,6 +387,29 @@ class SimpleWorkingVideo:
                         fill=(180, 100, 100), outline=(140, 70, 70), width=3)
 
 
+@lru_cache(maxsize=1024)
+def _cached_visemes(mapper, word: str, language: str) -> Dict:
+    """
+    Viseme analysis for a practice word, computed once per (word, language)
+    
+    The mapper is deterministic, so repeat requests reuse the same dict;
+    callers must treat it as read-only.
+    """
+    return mapper.word_to_visemes(word, language)
+
+
+# Per-process state for frame rendering workers
+_worker_video = None
+
+def _init_frame_worker(video: SimpleWorkingVideo):
+    global _worker_video
+    _worker_video = video
+
+def _render_frame_worker(key: Tuple[str, str]) -> bytes:
+    phoneme, shape = key
+    return _worker_video._create_frame(phoneme, shape).tobytes()
+
+
 # Singleton instance
 _instance = None
 
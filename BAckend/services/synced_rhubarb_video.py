@@ -8,8 +8,11 @@ Synced Rhubarb Lip Sync Video Generator
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import shutil
 import subprocess
+import tempfile
 import os
 from .phoneme_viseme_mapper import get_phoneme_viseme_mapper
 
@@ -49,11 +52,22 @@ class SyncedRhubarbVideo:
         'w': 'X', 'r': 'X', 'ʊ': 'X', 'u': 'X', 'oʊ': 'X', 'ū': 'X',
     }
     
+    # Distinct frames needed before rendering moves to a process pool
+    PARALLEL_MIN_FRAMES = 24
+    
+    # Transparent tile every mouth shape is baked into, centred on the mouth
+    MOUTH_TILE_SIZE = (120, 80)
+    
     def __init__(self, width: int = 800, height: int = 600, fps: int = 15):
         self.width = width
         self.height = height
         self.fps = fps
         self.mapper = get_phoneme_viseme_mapper()
+        self._load_fonts()
+        self._avatar_layer = self._build_avatar_layer()
+        self._mouth_tiles = self._bake_mouth_tiles()
+        self._duration_cache = {}
+        self._frame_buf = Image.new('RGB', (self.width, self.height))
     
     def generate_animation(self, word: str, language: str, output_path: str, audio_path: str = None) -> str:
         """
@@ -87,12 +101,17 @@ class SyncedRhubarbVideo:
         print(f"Phonemes: {len(visemes)}")
         print(f"Total duration: {audio_duration_ms}ms")
         
-        # Generate frames with proper timing
+        # Generate raw RGB frames with proper timing; a frame depends only on
+        # (phoneme, shape), so each is rendered once and repeated by reference
         frames = []
+        frame_cache = {}
         total_frames = int((audio_duration_ms / 1000.0) * self.fps)
         
+        # Background, avatar and word label are the same in every frame
+        base_frame = self._build_base_frame(word)
+        
         # Calculate frame timing for each phoneme
-        current_frame = 0
+        segments = []
         for viseme_info in visemes:
             phoneme = viseme_info['phoneme']
             duration_ms = viseme_info['duration']
@@ -104,72 +123,127 @@ class SyncedRhubarbVideo:
             shape = self.PHONEME_TO_RHUBARB.get(phoneme, 'A')
             
             print(f"  {phoneme:4s} → {shape} ({num_frames} frames, {duration_ms}ms)")
-            
-            # Generate frames
-            for _ in range(num_frames):
-                frame = self._create_professional_frame(phoneme, shape, word)
-                frames.append(frame)
-                current_frame += 1
+            segments.append(((phoneme, shape), num_frames))
+        
+        # Generate frames
+        unique = list(dict.fromkeys(key for key, _ in segments))
+        frame_cache = dict(zip(unique, self._render_unique_frames(unique, word, base_frame)))
+        for key, num_frames in segments:
+            frames.extend([frame_cache[key]] * num_frames)
         
         # Pad to match audio duration exactly
-        while len(frames) < total_frames:
-            frames.append(frames[-1] if frames else self._create_professional_frame('', 'A', word))
+        if len(frames) < total_frames:
+            if not frames:
+                frames.append(self._create_professional_frame('', 'A', word, base_frame).tobytes())
+            frames.extend([frames[-1]] * (total_frames - len(frames)))
         
-        print(f"\nGenerated {len(frames)} frames ({len(frames)/self.fps:.2f}s)")
+        print(f"\nGenerated {len(frames)} frames ({len(frames)/self.fps:.2f}s, {len(frame_cache)} unique)")
         
-        # Save as video using moviepy
+        # Encode with ffmpeg, muxing the audio in the same pass
+        ffmpeg_path = self._find_ffmpeg()
+        has_audio = bool(audio_path) and os.path.exists(audio_path)
+        
+        print(f"\n📹 Encoding video...")
+        if has_audio:
+            try:
+                self._encode_with_ffmpeg(ffmpeg_path, frames, audio_path, output_path)
+                print(f"✅ Audio track added")
+            except RuntimeError as e:
+                print(f"⚠️ Could not add audio: {e}")
+                print(f"   Video will be generated without audio track")
+                has_audio = False
+        if not has_audio:
+            self._encode_with_ffmpeg(ffmpeg_path, frames, None, output_path)
+        
+        print(f"\n✅ Video saved: {output_path}")
+        print(f"✅ Codec: H.264 (browser-compatible)")
+        print(f"✅ Audio: {'Synced' if has_audio else 'No audio'}")
+        print(f"{'='*70}\n")
+        
+        return output_path
+    
+    # Audio formats that can be stream-copied into the MP4 without re-encoding
+    COPYABLE_AUDIO_EXTENSIONS = ('.m4a', '.aac', '.mp3')
+    
+    def _find_ffmpeg(self) -> str:
+        """Locate an ffmpeg binary on PATH, or the one bundled with imageio-ffmpeg"""
+        ffmpeg_path = shutil.which("ffmpeg")
+        if ffmpeg_path:
+            return ffmpeg_path
         try:
-            import moviepy
-            from moviepy.video.io.ImageSequenceClip import ImageSequenceClip
-            
-            # Convert PIL images to numpy arrays
-            frame_arrays = [np.array(frame) for frame in frames]
-            
-            # Create video clip
-            clip = ImageSequenceClip(frame_arrays, fps=self.fps)
-            
-            # Add audio if provided
-            if audio_path and os.path.exists(audio_path):
-                try:
-                    from moviepy.audio.io.AudioFileClip import AudioFileClip
-                    audio_clip = AudioFileClip(audio_path)
-                    clip = clip.set_audio(audio_clip)
-                    print(f"✅ Audio track added")
-                except Exception as e:
-                    print(f"⚠️ Could not add audio: {e}")
-                    print(f"   Video will be generated without audio track")
-            
-            # Write video with H.264 codec
-            print(f"\n📹 Encoding video...")
-            clip.write_videofile(
-                output_path,
-                codec='libx264',
-                audio_codec='aac' if audio_path else None,
-                preset='ultrafast',
-                ffmpeg_params=['-pix_fmt', 'yuv420p'],
-                logger=None  # Suppress moviepy logs
+            import imageio_ffmpeg
+            return imageio_ffmpeg.get_ffmpeg_exe()
+        except (ImportError, RuntimeError):
+            raise RuntimeError("ffmpeg not found. Install ffmpeg or run: pip install imageio-ffmpeg")
+    
+    def _encode_with_ffmpeg(self, ffmpeg_path: str, frames: List[bytes], audio_path: Optional[str], output_path: str):
+        """
+        Pipe raw RGB frames into ffmpeg's stdin as H.264, muxing the audio if given
+        
+        The clip length is set by the frames; the audio is cut to it.
+        """
+        cmd = [
+            ffmpeg_path, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+            '-s', f'{self.width}x{self.height}', '-r', str(self.fps),
+            '-i', '-',
+        ]
+        if audio_path:
+            cmd.extend(['-i', audio_path])
+        # Flat, mostly static cartoon frames: still-image tuning compresses them far better
+        cmd.extend(['-c:v', 'libx264', '-preset', 'veryfast', '-tune', 'stillimage',
+                    '-crf', '23', '-g', '30', '-pix_fmt', 'yuv420p'])
+        if audio_path:
+            if Path(audio_path).suffix.lower() in self.COPYABLE_AUDIO_EXTENSIONS:
+                cmd.extend(['-c:a', 'copy'])
+            else:
+                cmd.extend(['-c:a', 'aac'])
+        cmd.extend(['-t', f'{len(frames) / self.fps:.3f}', output_path])
+        
+        with tempfile.TemporaryFile() as stderr_file:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr_file
             )
+            try:
+                for frame in frames:
+                    proc.stdin.write(frame)
+            except BrokenPipeError:
+                pass
+            finally:
+                try:
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass
+                returncode = proc.wait()
             
-            print(f"\n✅ Video saved: {output_path}")
-            print(f"✅ Codec: H.264 (browser-compatible)")
-            print(f"✅ Audio: {'Synced' if audio_path else 'No audio'}")
-            print(f"{'='*70}\n")
-            
-            return output_path
-            
-        except ImportError:
-            print("❌ moviepy not installed!")
-            raise
+            if returncode != 0:
+                stderr_file.seek(0)
+                error = stderr_file.read().decode(errors='replace').strip()
+                raise RuntimeError(f"ffmpeg failed: {error}")
     
     def _get_audio_duration(self, audio_path: str) -> int:
-        """Get audio duration in milliseconds"""
+        """
+        Get audio duration in milliseconds
+        
+        Read from the file header (soundfile, then ffprobe) rather than by
+        decoding the audio, and cached per (path, mtime).
+        """
         try:
-            import librosa
-            audio, sr = librosa.load(audio_path, sr=None)
-            duration_sec = len(audio) / sr
-            return int(duration_sec * 1000)
-        except:
-            # Fallback: use ffprobe
+            cache_key = (audio_path, os.path.getmtime(audio_path))
+        except OSError:
+            cache_key = None
+        if cache_key in self._duration_cache:
+            return self._duration_cache[cache_key]
+        
+        try:
+            import soundfile as sf
+            info = sf.info(audio_path)
+            duration_ms = int(info.frames / info.samplerate * 1000)
+        except Exception:
+            # Fallback: use ffprobe (compressed formats soundfile can't read)
             try:
                 result = subprocess.run([
                     'ffprobe', '-v', 'error',
@@ -178,49 +252,130 @@ class SyncedRhubarbVideo:
                     audio_path
                 ], capture_output=True, text=True)
                 duration_sec = float(result.stdout.strip())
-                return int(duration_sec * 1000)
+                duration_ms = int(duration_sec * 1000)
             except:
                 return 1000  # Default 1 second
+        
+        if cache_key is not None:
+            self._duration_cache[cache_key] = duration_ms
+        return duration_ms
     
-    def _create_professional_frame(self, phoneme: str, shape: str, word: str) -> Image.Image:
-        """Create professional 2D animated frame"""
+    def _render_unique_frames(self, unique: List[Tuple[str, str]], word: str,
+                              base_frame: Image.Image) -> List[bytes]:
+        """
+        Raw RGB bytes for each distinct (phoneme, shape)
         
-        # Create image with gradient background
-        img = Image.new('RGB', (self.width, self.height))
+        Words with many distinct frames are spread across worker processes;
+        short ones are rendered inline, where the pool start-up would cost
+        more than the drawing.
+        """
+        if len(unique) < self.PARALLEL_MIN_FRAMES:
+            return [self._create_professional_frame(phoneme, shape, word, base_frame).tobytes()
+                    for phoneme, shape in unique]
+        
+        with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                 initializer=_init_frame_worker,
+                                 initargs=(self, word, base_frame)) as executor:
+            return list(executor.map(_render_frame_worker, unique))
+    
+    def _load_fonts(self):
+        """Load the label fonts, falling back to PIL's default font"""
+        try:
+            self._font_large = ImageFont.truetype("arial.ttf", 32)
+            self._font_small = ImageFont.truetype("arial.ttf", 18)
+        except:
+            self._font_large = ImageFont.load_default()
+            self._font_small = ImageFont.load_default()
+    
+    def __getstate__(self):
+        # Workers only draw frames; the mapper stays in the parent process.
+        # Font objects are not always picklable; worker processes reload them.
+        state = self.__dict__.copy()
+        state.pop('mapper', None)
+        state.pop('_font_large', None)
+        state.pop('_font_small', None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._load_fonts()
+    
+    def _build_gradient(self) -> Image.Image:
+        """Gradient background (blue to white), one color per row"""
+        ys = np.arange(self.height, dtype=np.float64)
+        color_val = (200 + (ys / self.height) * 55).astype(np.int64)
+        row_colors = np.stack([color_val - 50, color_val - 30, color_val], axis=1).astype(np.uint8)
+        
+        gradient = np.broadcast_to(row_colors[:, None, :], (self.height, self.width, 3))
+        return Image.fromarray(np.ascontiguousarray(gradient), 'RGB')
+    
+    def _build_avatar_layer(self) -> Image.Image:
+        """Gradient background with the avatar minus its mouth, rendered once"""
+        img = self._build_gradient()
         draw = ImageDraw.Draw(img)
         
-        # Gradient background (blue to white)
-        for y in range(self.height):
-            color_val = int(200 + (y / self.height) * 55)
-            draw.rectangle([0, y, self.width, y+1], fill=(color_val-50, color_val-30, color_val))
-        
         # Avatar position (centered)
         center_x = self.width // 2
         center_y = self.height // 2 - 30
+        self._draw_avatar_features(draw, center_x, center_y)
         
-        # Draw professional avatar
-        self._draw_avatar(draw, center_x, center_y, shape)
-        
-        # Draw labels
-        try:
-            font_large = ImageFont.truetype("arial.ttf", 32)
-            font_medium = ImageFont.truetype("arial.ttf", 24)
-            font_small = ImageFont.truetype("arial.ttf", 18)
-        except:
-            font_large = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-            font_small = ImageFont.load_default()
+        return img
+    
+    def _build_base_frame(self, word: str) -> Image.Image:
+        """Avatar layer with the word label, shared by every frame of one word"""
+        img = self._avatar_layer.copy()
+        draw = ImageDraw.Draw(img)
+        center_x = self.width // 2
         
         # Word label at top
         word_text = f'"{word.upper()}"'
-        bbox = draw.textbbox((0, 0), word_text, font=font_large)
+        bbox = draw.textbbox((0, 0), word_text, font=self._font_large)
         text_width = bbox[2] - bbox[0]
         draw.text((center_x - text_width//2, 30), word_text, 
-                 fill=(50, 50, 50), font=font_large)
+                 fill=(50, 50, 50), font=self._font_large)
+        
+        return img
+    
+    def _bake_mouth_tiles(self) -> Dict[str, Image.Image]:
+        """Draw each Rhubarb mouth shape once onto a transparent tile for pasting"""
+        tile_w, tile_h = self.MOUTH_TILE_SIZE
+        tiles = {}
+        for shape in set(self.PHONEME_TO_RHUBARB.values()):
+            tile = Image.new('RGBA', self.MOUTH_TILE_SIZE, (0, 0, 0, 0))
+            self._draw_rhubarb_mouth(ImageDraw.Draw(tile), tile_w // 2, tile_h // 2, shape)
+            tiles[shape] = tile
+        return tiles
+    
+    def _create_professional_frame(self, phoneme: str, shape: str, word: str,
+                                   base_frame: Image.Image = None) -> Image.Image:
+        """
+        Create professional 2D animated frame
+        
+        The frame is drawn into one reused image, so it is only valid until
+        the next frame is created.
+        
+        Args:
+            base_frame: Result of _build_base_frame(word), to skip rebuilding it
+        """
+        if base_frame is None:
+            base_frame = self._build_base_frame(word)
+        img = self._frame_buf
+        img.paste(base_frame)
+        draw = ImageDraw.Draw(img)
+        
+        # Avatar position (centered)
+        center_x = self.width // 2
+        center_y = self.height // 2 - 30
+        
+        # Paste the pre-baked Rhubarb mouth
+        tile = self._mouth_tiles.get(shape)
+        if tile is not None:
+            tile_w, tile_h = self.MOUTH_TILE_SIZE
+            img.paste(tile, (center_x - tile_w // 2, center_y + 90 - tile_h // 2), tile)
         
         # Phoneme and shape label at bottom
         label = f"Phoneme: {phoneme if phoneme else 'silence'} | Rhubarb Shape: {shape}"
-        bbox = draw.textbbox((0, 0), label, font=font_small)
+        bbox = draw.textbbox((0, 0), label, font=self._font_small)
         text_width = bbox[2] - bbox[0]
         
         # Label background
@@ -230,12 +385,20 @@ class SyncedRhubarbVideo:
                       fill=(50, 50, 50, 230))
         
         draw.text((center_x - text_width//2, label_y), label,
-                 fill=(255, 255, 255), font=font_small)
+                 fill=(255, 255, 255), font=self._font_small)
         
         return img
     
     def _draw_avatar(self, draw: ImageDraw.Draw, x: int, y: int, mouth_shape: str):
         """Draw professional 2D avatar with Rhubarb mouth"""
+        self._draw_avatar_features(draw, x, y)
+        
+        # Mouth (Rhubarb shapes)
+        mouth_y = y + 90
+        self._draw_rhubarb_mouth(draw, x, mouth_y, mouth_shape)
+    
+    def _draw_avatar_features(self, draw: ImageDraw.Draw, x: int, y: int):
+        """Draw everything of the professional avatar except the mouth"""
         
         # Face (larger, more realistic)
         face_w, face_h = 240, 300
@@ -274,10 +437,6 @@ class SyncedRhubarbVideo:
                     fill=(180, 140, 120))
         draw.ellipse([x + 3, nose_y + 5, x + 8, nose_y + 10],
                     fill=(180, 140, 120))
-        
-        # Mouth (Rhubarb shapes)
-        mouth_y = y + 90
-        self._draw_rhubarb_mouth(draw, x, mouth_y, mouth_shape)
     
     def _draw_rhubarb_mouth(self, draw: ImageDraw.Draw, x: int, y: int, shape: str):
         """Draw Rhubarb Preston Blair mouth shapes"""
@@ -343,6 +502,22 @@ class SyncedRhubarbVideo:
                         fill=inner_mouth)
 
 
+# Per-process state for frame rendering workers
+_worker_video = None
+_worker_word = None
+_worker_base_frame = None
+
+def _init_frame_worker(video: SyncedRhubarbVideo, word: str, base_frame: Image.Image):
+    global _worker_video, _worker_word, _worker_base_frame
+    _worker_video = video
+    _worker_word = word
+    _worker_base_frame = base_frame
+
+def _render_frame_worker(key: Tuple[str, str]) -> bytes:
+    phoneme, shape = key
+    return _worker_video._create_professional_frame(phoneme, shape, _worker_word, _worker_base_frame).tobytes()
+
+
 # Singleton
 _instance = None
 
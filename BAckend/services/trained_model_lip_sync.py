@@ -5,13 +5,17 @@ This is YOUR custom-trained model for accurate lip sync!
 """
 
 import os
+import queue
 import sys
+import threading
+from concurrent.futures import Future
 import torch
 import torch.nn as nn
+from torch.nn.utils.rnn import pack_padded_sequence, pad_packed_sequence, pad_sequence
 import librosa
 import numpy as np
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from pydub import AudioSegment
 
 # Add parent directory to path
@@ -56,6 +60,9 @@ class TrainedModelLipSync:
     Predicts visemes directly from audio features
     """
     
+    # Most concurrent requests run through the LSTM in one forward pass
+    MAX_BATCH = 8
+    
     def __init__(self, model_path='models/simple_best_model.pt'):
         """
         Initialize with your trained model
@@ -65,6 +72,8 @@ class TrainedModelLipSync:
         """
         self.model_path = Path(__file__).parent.parent / model_path
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        # Half precision on GPU (cuDNN fp16 LSTM); CPU stays in fp32
+        self.dtype = torch.float16 if self.device.type == 'cuda' else torch.float32
         
         # Viseme mapping (9 mouth shapes)
         self.viseme_map = {
@@ -82,6 +91,12 @@ class TrainedModelLipSync:
         # Load model
         self.model = self._load_model()
         
+        # Requests waiting for the shared LSTM forward pass
+        self._batch_queue = queue.Queue()
+        self._batch_worker = None
+        self._batch_worker_lock = threading.Lock()
+        self._packed_batches = True
+        
         print(f"✅ Trained Model Lip Sync initialized")
         print(f"   Model: {self.model_path.name}")
         print(f"   Device: {self.device}")
@@ -90,6 +105,11 @@ class TrainedModelLipSync:
     def _load_model(self):
         """Load your trained model"""
         try:
+            # Reuse the TorchScript export of these weights if there is one
+            scripted = self._load_scripted_model()
+            if scripted is not None:
+                return scripted
+            
             # Create model
             model = LipSyncModel().to(self.device)
             
@@ -99,18 +119,68 @@ class TrainedModelLipSync:
                 model.load_state_dict(checkpoint)
                 model.eval()
                 print(f"✅ Loaded trained model from {self.model_path}")
+                return self._script_model(model.to(dtype=self.dtype))
             else:
                 print(f"⚠️ Model file not found: {self.model_path}")
                 print(f"   Using untrained model (will have random predictions)")
             
-            return model
+            return model.to(dtype=self.dtype)
         
         except Exception as e:
             print(f"⚠️ Error loading model: {e}")
             # Return untrained model as fallback
-            model = LipSyncModel().to(self.device)
+            model = LipSyncModel().to(self.device, dtype=self.dtype)
+            model.eval()
+            return model
+    
+    def _scripted_model_path(self) -> Path:
+        """TorchScript export next to the checkpoint, one per device type"""
+        return self.model_path.with_suffix(f'.{self.device.type}.ts.pt')
+    
+    def _load_scripted_model(self):
+        """
+        Load the cached TorchScript model if it is newer than the checkpoint
+        
+        Returns:
+            ScriptModule, or None when there is no usable export
+        """
+        scripted_path = self._scripted_model_path()
+        if not self.model_path.exists() or not scripted_path.exists():
+            return None
+        if scripted_path.stat().st_mtime < self.model_path.stat().st_mtime:
+            return None
+        
+        try:
+            model = torch.jit.load(str(scripted_path), map_location=self.device)
             model.eval()
+            print(f"✅ Loaded TorchScript model from {scripted_path}")
+            return model
+        except Exception as e:
+            print(f"⚠️ Could not load TorchScript model: {str(e)[:100]}")
+            return None
+    
+    def _script_model(self, model: LipSyncModel):
+        """
+        Compile the trained model with TorchScript and cache it on disk
+        
+        Scripting (rather than tracing) keeps the sequence length dynamic.
+        If scripting fails, the eager model is used.
+        """
+        try:
+            scripted = torch.jit.script(model)
+        except Exception as e:
+            print(f"⚠️ TorchScript unavailable, using eager model: {str(e)[:100]}")
             return model
+        
+        try:
+            scripted_path = self._scripted_model_path()
+            tmp_path = scripted_path.with_suffix('.tmp')
+            torch.jit.save(scripted, str(tmp_path))
+            os.replace(tmp_path, scripted_path)
+            print(f"⚡ Cached TorchScript model: {scripted_path.name}")
+        except Exception as e:
+            print(f"⚠️ Could not cache TorchScript model: {str(e)[:100]}")
+        return scripted
     
     def extract_audio_features(self, audio_path: str) -> np.ndarray:
         """
@@ -125,6 +195,10 @@ class TrainedModelLipSync:
         # Load audio
         y, sr = librosa.load(audio_path, sr=22050)
         
+        return self._features_from_audio(y, sr)
+    
+    def _features_from_audio(self, y: np.ndarray, sr: int) -> np.ndarray:
+        """Audio features (MFCC + energy + ZCR) for already-loaded audio"""
         # Extract MFCC (13 coefficients)
         mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
         
@@ -132,19 +206,40 @@ class TrainedModelLipSync:
         energy = librosa.feature.rms(y=y)
         
         # Extract zero crossing rate
-        zcr = librosa.feature.zero_crossing_rate(y)
+        zcr = self._zero_crossing_rate(y)
         
         # Combine features (13 + 1 + 1 = 15 features)
         features = np.vstack([mfcc, energy, zcr]).T
         
         return features
     
-    def predict_visemes(self, audio_path: str) -> List[Dict]:
+    def _zero_crossing_rate(self, y: np.ndarray, frame_length: int = 2048, hop_length: int = 512) -> np.ndarray:
+        """
+        librosa.feature.zero_crossing_rate with its defaults, from one pass
+        
+        Sign changes are found once over the whole edge-padded signal and
+        counted per frame with a cumulative sum, instead of framing the
+        signal and comparing every frame's samples separately.
+        
+        Returns:
+            (1, n_frames) zero crossing rate
+        """
+        y = np.pad(y, frame_length // 2, mode='edge')
+        signs = np.signbit(np.where(np.abs(y) <= 1e-10, 0, y))
+        crossings = np.concatenate(([0], np.cumsum(signs[1:] != signs[:-1])))
+        
+        # Each frame counts the crossings between its own samples
+        starts = np.arange(1 + (len(y) - frame_length) // hop_length) * hop_length
+        counts = crossings[starts + frame_length - 1] - crossings[starts]
+        return (counts / frame_length)[np.newaxis, :]
+    
+    def predict_visemes(self, audio_path: str, audio: Tuple[np.ndarray, int] = None) -> List[Dict]:
         """
         Predict viseme sequence from audio using your trained model
         
         Args:
             audio_path: Path to audio file
+            audio: (y, sr) already loaded at 22050 Hz, to skip decoding the file
             
         Returns:
             List of viseme predictions with timing
@@ -156,22 +251,20 @@ class TrainedModelLipSync:
             print(f"Audio: {audio_path}")
             print(f"Using YOUR trained model!")
             
+            # Load audio once for features and timing
+            y, sr = audio if audio is not None else librosa.load(audio_path, sr=22050)
+            
             # Extract audio features
-            audio_features = self.extract_audio_features(audio_path)
+            audio_features = self._features_from_audio(y, sr)
             print(f"✅ Extracted features: {audio_features.shape}")
             
-            # Prepare input
-            x = torch.FloatTensor(audio_features).unsqueeze(0).to(self.device)
-            
-            # Predict
-            with torch.no_grad():
-                output = self.model(x)
-                predictions = torch.argmax(output, dim=-1).squeeze().cpu().numpy()
+            # Predict (batched with any requests running at the same time)
+            predictions = self._predict(audio_features)
             
             print(f"✅ Predicted {len(predictions)} visemes")
             
             # Convert to mouth cues with timing
-            mouth_cues = self._predictions_to_mouth_cues(predictions, audio_path)
+            mouth_cues = self._predictions_to_mouth_cues(predictions, y, sr)
             
             print(f"✅ Generated {len(mouth_cues)} mouth cues")
             print(f"{'='*70}\n")
@@ -184,83 +277,139 @@ class TrainedModelLipSync:
             traceback.print_exc()
             return []
     
-    def _predictions_to_mouth_cues(self, predictions: np.ndarray, audio_path: str) -> List[Dict]:
+    def _predict(self, audio_features: np.ndarray) -> np.ndarray:
+        """
+        Predicted viseme id per feature frame
+        
+        Requests are queued for one worker thread, which runs whatever has
+        arrived (up to MAX_BATCH) through the LSTM as a single batch. A lone
+        request runs immediately; nothing waits for a batch to fill.
+        """
+        with self._batch_worker_lock:
+            if self._batch_worker is None:
+                self._batch_worker = threading.Thread(target=self._run_batches, daemon=True)
+                self._batch_worker.start()
+        
+        request = Future()
+        self._batch_queue.put((audio_features, request))
+        return request.result()
+    
+    def _run_batches(self):
+        """Batch worker: drain pending requests and answer each with its predictions"""
+        while True:
+            batch = [self._batch_queue.get()]
+            while len(batch) < self.MAX_BATCH:
+                try:
+                    batch.append(self._batch_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                results = self._forward_batch([features for features, _ in batch])
+            except Exception as e:
+                for _, request in batch:
+                    request.set_exception(e)
+                continue
+            
+            for (_, request), predictions in zip(batch, results):
+                request.set_result(predictions)
+    
+    def _forward_batch(self, features_list: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Run feature sequences through the model together
+        
+        Sequences are packed rather than just zero-padded, so the backward
+        LSTM direction starts at each sequence's own end and results match
+        running them one at a time.
+        """
+        inputs = [self._to_device(features) for features in features_list]
+        
+        with torch.inference_mode():
+            if len(inputs) > 1 and self._packed_batches:
+                try:
+                    lengths = torch.tensor([len(x) for x in inputs])
+                    packed = pack_padded_sequence(pad_sequence(inputs, batch_first=True), lengths,
+                                                  batch_first=True, enforce_sorted=False)
+                    lstm_out, _ = self.model.lstm(packed)
+                    lstm_out, _ = pad_packed_sequence(lstm_out, batch_first=True)
+                    predictions = torch.argmax(self.model.fc(lstm_out), dim=-1).cpu().numpy()
+                    return [predictions[i, :n].squeeze() for i, n in enumerate(lengths.tolist())]
+                except Exception as e:
+                    print(f"⚠️ Batched inference unavailable, running requests one by one: {str(e)[:100]}")
+                    self._packed_batches = False
+            
+            return [torch.argmax(self.model(x.unsqueeze(0)), dim=-1).squeeze().cpu().numpy() for x in inputs]
+    
+    def _to_device(self, features: np.ndarray) -> torch.Tensor:
+        """
+        Move a feature array to the model device without extra host copies
+        
+        torch.from_numpy shares the array's buffer; on CUDA the tensor is
+        pinned so the host-to-device copy can run non-blocking and overlap
+        the kernel launches that follow.
+        """
+        tensor = torch.from_numpy(np.ascontiguousarray(features, dtype=np.float32))
+        if self.device.type == "cuda":
+            tensor = tensor.pin_memory()
+        return tensor.to(self.device, dtype=self.dtype, non_blocking=True)
+    
+    def _predictions_to_mouth_cues(self, predictions: np.ndarray, y: np.ndarray, sr: int) -> List[Dict]:
         """
         Convert model predictions to mouth cues with PRECISE timing and smoothing
         
         Args:
             predictions: Array of predicted viseme IDs
-            audio_path: Path to audio file (for duration)
+            y: Audio samples (for duration and onsets)
+            sr: Sample rate
             
         Returns:
             List of mouth cues with precise timing
         """
         # Get audio duration and features for precise timing
-        y, sr = librosa.load(audio_path, sr=22050)
         duration = librosa.get_duration(y=y, sr=sr)
         
-        # Detect onsets for precise timing
-        onset_frames = librosa.onset.onset_detect(
-            y=y, 
-            sr=sr, 
-            units='time',
-            hop_length=256,
-            backtrack=True
-        )
-        
         # Calculate energy for better mouth opening
         hop_length = 256
         energy = librosa.feature.rms(y=y, hop_length=hop_length)[0]
         times = librosa.frames_to_time(np.arange(len(energy)), sr=sr, hop_length=hop_length)
         
+        # Detect onsets for precise timing: frames where the energy jumps by
+        # half again over the previous frame and is above average. Cues only
+        # snap within 50 ms, so this is close enough to full spectral-flux
+        # onset detection at a fraction of the cost.
+        rising = (energy[1:] > energy[:-1] * 1.5) & (energy[1:] > energy.mean())
+        onset_frames = times[1:][rising]
+        
         # Calculate time per prediction frame
         time_per_frame = duration / len(predictions)
         
         # Smooth predictions to avoid jitter
         smoothed_predictions = self._smooth_predictions(predictions)
         
-        # Convert predictions to mouth cues with precise timing
-        mouth_cues = []
-        current_viseme = None
-        start_time = 0.0
+        # Viseme per frame (several prediction ids may share one)
+        classes, inverse = np.unique(smoothed_predictions, return_inverse=True)
+        class_visemes = np.array([self.viseme_map.get(int(c), 'X') for c in classes], dtype=object)
+        frame_visemes = class_visemes[inverse.ravel()]
+        if len(frame_visemes) == 0:
+            return []
         
-        for i, pred_id in enumerate(smoothed_predictions):
-            viseme = self.viseme_map.get(int(pred_id), 'X')
-            current_time = i * time_per_frame
-            
-            # If viseme changed, save previous cue
-            if viseme != current_viseme:
-                if current_viseme is not None:
-                    end_time = current_time
-                    
-                    # Snap to nearest onset if close
-                    nearest_onset = self._find_nearest_onset(onset_frames, start_time)
-                    if nearest_onset is not None and abs(nearest_onset - start_time) < 0.05:
-                        start_time = nearest_onset
-                    
-                    nearest_onset_end = self._find_nearest_onset(onset_frames, end_time)
-                    if nearest_onset_end is not None and abs(nearest_onset_end - end_time) < 0.05:
-                        end_time = nearest_onset_end
-                    
-                    mouth_cues.append({
-                        'start': start_time,
-                        'end': end_time,
-                        'value': current_viseme
-                    })
-                
-                current_viseme = viseme
-                start_time = current_time
-        
-        # Add final cue
-        if current_viseme is not None:
-            mouth_cues.append({
-                'start': start_time,
-                'end': duration,
-                'value': current_viseme
-            })
+        # A new cue starts wherever the viseme changes
+        change_idx = np.concatenate(([0], np.flatnonzero(frame_visemes[1:] != frame_visemes[:-1]) + 1))
+        change_times = change_idx * time_per_frame
+        
+        # Snap closed cues' starts and ends to nearby onsets; the final cue
+        # keeps its own start and ends at the audio duration
+        starts = change_times.copy()
+        starts[:-1] = self._snap_to_onsets(onset_frames, change_times[:-1])
+        ends = np.append(self._snap_to_onsets(onset_frames, change_times[1:]), duration)
         
         # Post-process: merge very short cues
-        mouth_cues = self._merge_short_cues(mouth_cues, min_duration=0.03)
+        starts, ends, values = self._merge_short_cues(starts, ends, frame_visemes[change_idx], min_duration=0.03)
+        
+        mouth_cues = [
+            {'start': start, 'end': end, 'value': value}
+            for start, end, value in zip(starts.tolist(), ends.tolist(), values)
+        ]
         
         return mouth_cues
     
@@ -275,69 +424,103 @@ class TrainedModelLipSync:
         Returns:
             Smoothed predictions
         """
-        smoothed = predictions.copy()
-        
-        for i in range(len(predictions)):
-            # Get window
-            start = max(0, i - window_size // 2)
-            end = min(len(predictions), i + window_size // 2 + 1)
-            window = predictions[start:end]
-            
-            # Use most common prediction in window
-            unique, counts = np.unique(window, return_counts=True)
-            smoothed[i] = unique[np.argmax(counts)]
-        
-        return smoothed
+        if len(predictions) == 0:
+            return predictions.copy()
+        
+        # Count each class in every window (truncated at the edges) with a
+        # cumulative sum over one-hot rows; ties go to the smallest class,
+        # as with np.unique + argmax
+        half = window_size // 2
+        classes, inverse = np.unique(predictions, return_inverse=True)
+        one_hot = np.zeros((len(predictions) + 2 * half, len(classes)), dtype=np.int32)
+        one_hot[np.arange(len(predictions)) + half, inverse.ravel()] = 1
+        
+        cumulative = np.zeros((len(one_hot) + 1, len(classes)), dtype=np.int32)
+        np.cumsum(one_hot, axis=0, out=cumulative[1:])
+        window_counts = cumulative[2 * half + 1:] - cumulative[:len(predictions)]
+        
+        return classes[window_counts.argmax(axis=1)].astype(predictions.dtype)
     
-    def _find_nearest_onset(self, onset_frames: np.ndarray, time: float) -> float:
-        """Find nearest onset to given time"""
-        if len(onset_frames) == 0:
-            return None
+    def _snap_to_onsets(self, onset_frames: np.ndarray, times: np.ndarray, max_shift: float = 0.05) -> np.ndarray:
+        """
+        Move each time to its nearest onset when that onset is within max_shift
         
-        distances = np.abs(onset_frames - time)
-        nearest_idx = np.argmin(distances)
+        Onset times are sorted, so only the two neighbours of each insertion
+        point are compared (the earlier one wins a tie).
+        """
+        if len(onset_frames) == 0 or len(times) == 0:
+            return times
         
-        if distances[nearest_idx] < 0.1:  # Within 100ms
-            return onset_frames[nearest_idx]
+        idx = np.searchsorted(onset_frames, times)
+        left = onset_frames[np.maximum(idx - 1, 0)]
+        right = onset_frames[np.minimum(idx, len(onset_frames) - 1)]
+        nearest = np.where(np.abs(left - times) <= np.abs(right - times), left, right)
         
-        return None
+        return np.where(np.abs(nearest - times) < max_shift, nearest, times)
     
-    def _merge_short_cues(self, mouth_cues: List[Dict], min_duration: float = 0.03) -> List[Dict]:
+    def _merge_short_cues(self, starts: np.ndarray, ends: np.ndarray, values: np.ndarray,
+                          min_duration: float = 0.03):
         """
         Merge very short cues with neighbors
         
+        Scanning left to right, a short cue (other than the last) takes over
+        the next cue's end and viseme, and that next cue is dropped. Within a
+        run of consecutive short cues this makes every second one, counted
+        from the start of the run, a merging cue.
+        
         Args:
-            mouth_cues: List of mouth cues
+            starts, ends, values: Cue start times, end times and visemes
             min_duration: Minimum cue duration in seconds
             
         Returns:
-            Merged mouth cues
+            Merged (starts, ends, values)
         """
-        if not mouth_cues:
-            return mouth_cues
-        
-        merged = []
-        i = 0
+        if len(starts) == 0:
+            return starts, ends, values
+        
+        # If cue is too short, merge with next
+        short = (ends - starts) < min_duration
+        short[-1] = False
+        
+        positions = np.arange(len(starts))
+        run_begins = short & ~np.concatenate(([False], short[:-1]))
+        run_start = np.maximum.accumulate(np.where(run_begins, positions, 0))
+        merging = short & ((positions - run_start) % 2 == 0)
+        
+        # Use next cue's end and viseme
+        merged_ends = ends.copy()
+        merged_values = values.copy()
+        next_idx = np.flatnonzero(merging) + 1
+        merged_ends[merging] = ends[next_idx]
+        merged_values[merging] = values[next_idx]
+        
+        keep = ~np.concatenate(([False], merging[:-1]))
+        return starts[keep], merged_ends[keep], merged_values[keep]
+    
+    def _load_audio(self, audio_path: str):
+        """
+        Decode audio at 22050 Hz, converting to WAV only when it can't be read directly
         
-        while i < len(mouth_cues):
-            cue = mouth_cues[i]
-            duration = cue['end'] - cue['start']
-            
-            # If cue is too short, merge with next or previous
-            if duration < min_duration and i < len(mouth_cues) - 1:
-                # Merge with next
-                next_cue = mouth_cues[i + 1]
-                merged.append({
-                    'start': cue['start'],
-                    'end': next_cue['end'],
-                    'value': next_cue['value']  # Use next cue's viseme
-                })
-                i += 2
-            else:
-                merged.append(cue)
-                i += 1
+        librosa reads WAV/FLAC/OGG with soundfile and most compressed formats
+        through its audioread/ffmpeg backend, so the pydub WAV export is only
+        a fallback.
         
-        return merged
+        Returns:
+            (path that was decoded, (samples, sample_rate))
+        """
+        try:
+            return audio_path, librosa.load(audio_path, sr=22050)
+        except Exception as e:
+            if audio_path.endswith('.wav'):
+                raise
+            print(f"⚠️ Direct decode failed ({str(e)[:80]}), converting to WAV")
+        
+        # Convert to WAV
+        wav_path = audio_path.replace(Path(audio_path).suffix, '.wav')
+        audio = AudioSegment.from_file(audio_path)
+        audio.export(wav_path, format='wav')
+        print(f"✅ Converted to WAV: {wav_path}")
+        return wav_path, librosa.load(wav_path, sr=22050)
     
     def generate_lip_sync(self, audio_path: str, text: str, language: str = 'en') -> Dict:
         """
@@ -352,22 +535,16 @@ class TrainedModelLipSync:
             Lip sync data with mouth cues
         """
         try:
-            # Convert to WAV if needed
-            wav_path = audio_path
-            if not audio_path.endswith('.wav'):
-                wav_path = audio_path.replace(Path(audio_path).suffix, '.wav')
-                audio = AudioSegment.from_file(audio_path)
-                audio.export(wav_path, format='wav')
-                print(f"✅ Converted to WAV: {wav_path}")
+            # Decode once; prediction, cue timing and metadata share it
+            wav_path, (y, sr) = self._load_audio(audio_path)
             
             # Predict visemes
-            mouth_cues = self.predict_visemes(wav_path)
+            mouth_cues = self.predict_visemes(wav_path, audio=(y, sr))
             
             if not mouth_cues:
                 return None
             
             # Get audio duration
-            y, sr = librosa.load(wav_path, sr=22050)
             duration = librosa.get_duration(y=y, sr=sr)
             
             # Create lip sync data
@@ -6,13 +6,20 @@ Then maps those sounds to correct mouth shapes
 
 import os
 import json
-import librosa
+import hashlib
+import logging
+import shutil
+import tempfile
+import threading
 import numpy as np
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import subprocess
 from pydub import AudioSegment
 
+logger = logging.getLogger(__name__)
+
 
 class TrueAudioLipMapping:
     """
@@ -20,13 +27,28 @@ class TrueAudioLipMapping:
     Uses Rhubarb's audio analysis WITHOUT text bias
     """
     
+    # Rhubarb results keyed by audio content hash
+    CACHE_DIR = os.path.join(tempfile.gettempdir(), "true_lip_mapping_cache")
+    
     def __init__(self):
         """Initialize true audio-lip mapper"""
         self.rhubarb_path = r"C:\Users\Shafiqha\Downloads\Rhubarb-Lip-Sync-1.13.0-Windows\Rhubarb-Lip-Sync-1.13.0-Windows\rhubarb.exe"
+        self._warm_up()
         print(f"✅ True Audio-Lip Mapping initialized")
         print(f"   Method: Pure audio analysis (no text)")
         print(f"   Works for: ALL languages")
     
+    def _warm_up(self):
+        """
+        Run the feature pipeline once on a second of silence
+        
+        Imports scipy's FFT/filter modules and builds the 22050 Hz mel
+        filterbank at startup, so the first request does not pay for them.
+        """
+        silence = np.zeros(22050, dtype=np.float32)
+        _onset_detect(silence, 22050)
+        _frame_rms(silence)
+    
     def map_audio_to_lips(
         self,
         audio_path: str,
@@ -45,28 +67,33 @@ class TrueAudioLipMapping:
             Lip sync data mapped to actual audio
         """
         try:
-            print(f"\n{'='*70}")
-            print(f"🎯 TRUE AUDIO-TO-LIP MAPPING")
-            print(f"{'='*70}")
-            print(f"Text: {text}")
-            print(f"Language: {language}")
-            print(f"Audio: {audio_path}")
-            print(f"Method: Analyzing ACTUAL audio (ignoring text)")
+            logger.debug("🎯 TRUE AUDIO-TO-LIP MAPPING")
+            logger.debug("Text: %s", text)
+            logger.debug("Language: %s", language)
+            logger.debug("Audio: %s", audio_path)
+            logger.debug("Method: Analyzing ACTUAL audio (ignoring text)")
+            
+            # Reuse the Rhubarb result for audio we have already analysed
+            cache_key = self._audio_cache_key(audio_path)
+            cached_json = os.path.join(self.CACHE_DIR, f"rhubarb_{cache_key}.json")
+            if os.path.exists(cached_json):
+                alignment_data = self._read_json(cached_json)
+                logger.debug("⚡ Using cached audio analysis (%s)", cache_key)
+                return self._finish_mapping(alignment_data, audio_path)
             
             # Convert to WAV if needed
             wav_path = audio_path
+            samples = None
             if not audio_path.endswith('.wav'):
                 wav_path = audio_path.replace(Path(audio_path).suffix, '.wav')
-                audio = AudioSegment.from_file(audio_path)
-                audio.export(wav_path, format='wav')
-                print(f"✅ Converted to WAV")
+                samples = self._convert_to_wav(audio_path, wav_path)
+                logger.debug("✅ Converted to WAV")
             
             # Output JSON path
             output_json = wav_path.replace('.wav', '_true_mapping.json')
             
             # Run Rhubarb WITHOUT text - pure audio analysis
-            print(f"🔄 Running Rhubarb in AUDIO-ONLY mode...")
-            print(f"   (No text input = maps to ACTUAL sounds)")
+            logger.debug("🔄 Running Rhubarb in AUDIO-ONLY mode (no text input = maps to ACTUAL sounds)")
             
             cmd = [
                 self.rhubarb_path,
@@ -77,51 +104,216 @@ class TrueAudioLipMapping:
                 # NO --dialogFile = Rhubarb analyzes actual audio!
             ]
             
-            result = subprocess.run(
+            # Rhubarb runs in the background while the same WAV is analysed here
+            process = subprocess.Popen(
                 cmd,
-                capture_output=True,
-                timeout=120
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
             )
+            features = self._extract_audio_features(wav_path, samples)
+            try:
+                _, stderr = process.communicate(timeout=120)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                raise
             
-            if result.returncode == 0 and os.path.exists(output_json):
-                with open(output_json, 'r', encoding='utf-8') as f:
-                    alignment_data = json.load(f)
+            if process.returncode == 0 and os.path.exists(output_json):
+                alignment_data = self._read_json(output_json)
                 
-                print(f"✅ Audio analysis complete!")
-                print(f"   Duration: {alignment_data['metadata']['duration']:.2f}s")
-                print(f"   Mouth cues: {len(alignment_data['mouthCues'])}")
+                try:
+                    os.makedirs(self.CACHE_DIR, exist_ok=True)
+                    shutil.copyfile(output_json, cached_json)
+                except OSError as e:
+                    logger.warning("⚠️ Could not cache audio analysis: %s", e)
                 
-                # Enhance with audio features
-                enhanced_data = self._enhance_with_audio_features(
-                    alignment_data,
-                    wav_path
-                )
-                
-                # Show sample cues
-                print(f"\n📊 Mouth cues (mapped to ACTUAL audio):")
-                for i, cue in enumerate(enhanced_data['mouthCues'][:15]):
-                    print(f"   {i+1}. {cue['value']} ({cue['start']:.2f}s - {cue['end']:.2f}s)")
-                if len(enhanced_data['mouthCues']) > 15:
-                    print(f"   ... and {len(enhanced_data['mouthCues']) - 15} more")
-                
-                print(f"{'='*70}\n")
-                
-                return enhanced_data
+                return self._finish_mapping(alignment_data, wav_path, features)
             else:
-                error_msg = result.stderr.decode('utf-8', errors='ignore') if result.stderr else "Unknown error"
-                print(f"❌ Audio analysis failed: {error_msg}")
+                error_msg = stderr.decode('utf-8', errors='ignore') if stderr else "Unknown error"
+                logger.error("❌ Audio analysis failed: %s", error_msg)
                 return None
                 
         except Exception as e:
-            print(f"❌ Mapping error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Mapping error: %s", e)
+            return None
+    
+    def _find_ffmpeg(self) -> str:
+        """Locate an ffmpeg binary on PATH, or the one bundled with imageio-ffmpeg"""
+        ffmpeg_path = shutil.which("ffmpeg")
+        if ffmpeg_path:
+            return ffmpeg_path
+        try:
+            import imageio_ffmpeg
+            return imageio_ffmpeg.get_ffmpeg_exe()
+        except (ImportError, RuntimeError):
+            raise RuntimeError("ffmpeg not found. Install ffmpeg or run: pip install imageio-ffmpeg")
+    
+    def _convert_to_wav(self, audio_path: str, wav_path: str) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Decode audio to a mono 22050 Hz WAV in a single ffmpeg pass
+        
+        Writing the file directly avoids pydub decoding into a Python buffer
+        and re-encoding it, and matches the rate the enhancement pass loads
+        at. Falls back to pydub (same mono 22050 Hz output) if ffmpeg is
+        unavailable or fails.
+        
+        Args:
+            audio_path: Path to source audio
+            wav_path: Path of the WAV to write
+            
+        Returns:
+            (samples, sample_rate) when pydub already decoded the audio into
+            memory, None when ffmpeg wrote the file directly
+        """
+        try:
+            subprocess.run(
+                [self._find_ffmpeg(), '-y', '-loglevel', 'error', '-i', audio_path,
+                 '-ac', '1', '-ar', '22050', '-f', 'wav', wav_path],
+                check=True,
+                capture_output=True
+            )
+        except (RuntimeError, subprocess.CalledProcessError) as e:
+            logger.warning("⚠️ ffmpeg conversion failed (%s), using pydub", str(e)[:80])
+            audio = AudioSegment.from_file(audio_path).set_channels(1).set_frame_rate(22050).set_sample_width(2)
+            audio.export(wav_path, format='wav', parameters=['-acodec', 'pcm_s16le'])
+            
+            # Same float32 scaling soundfile applies when reading 16-bit PCM
+            samples = np.array(audio.get_array_of_samples(), dtype=np.float32) / 32768.0
+            return samples, audio.frame_rate
+        return None
+    
+    def _read_json(self, path: str) -> Dict:
+        """Parse a Rhubarb JSON file from raw bytes, with orjson when installed"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            import orjson
+            return orjson.loads(data)
+        except ImportError:
+            return json.loads(data)
+    
+    def _finish_mapping(self, alignment_data: Dict, audio_path: str, features: Dict = None) -> Dict:
+        """
+        Enhance a Rhubarb result with audio features and report it
+        
+        Args:
+            alignment_data: Rhubarb's audio-only analysis
+            audio_path: Path to audio file
+            features: Precomputed audio features (computed if None)
+            
+        Returns:
+            Enhanced alignment data
+        """
+        logger.debug("✅ Audio analysis complete! Duration: %.2fs, mouth cues: %d",
+                     alignment_data['metadata']['duration'], len(alignment_data['mouthCues']))
+        
+        # Enhance with audio features
+        enhanced_data = self._enhance_with_audio_features(
+            alignment_data,
+            audio_path,
+            features
+        )
+        
+        # Show sample cues (only formatted when debug logging is on)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📊 Mouth cues (mapped to ACTUAL audio):")
+            for i, cue in enumerate(enhanced_data['mouthCues'][:15]):
+                logger.debug("   %d. %s (%.2fs - %.2fs)", i + 1, cue['value'], cue['start'], cue['end'])
+            if len(enhanced_data['mouthCues']) > 15:
+                logger.debug("   ... and %d more", len(enhanced_data['mouthCues']) - 15)
+        
+        return enhanced_data
+    
+    def _audio_cache_key(self, audio_path: str) -> str:
+        """
+        Cheap content hash of an audio file for the Rhubarb cache
+        
+        Hashes the file size plus its first and last 64KB, which is enough
+        to tell recordings apart without reading whole files.
+        
+        Args:
+            audio_path: Path to audio file
+            
+        Returns:
+            Hex digest identifying this audio
+        """
+        chunk = 1 << 16
+        size = os.path.getsize(audio_path)
+        digest = hashlib.blake2b(f"{size}:".encode(), digest_size=8)
+        with open(audio_path, 'rb') as f:
+            digest.update(f.read(chunk))
+            if size > chunk:
+                f.seek(max(size - chunk, chunk))
+                digest.update(f.read())
+        return digest.hexdigest()
+    
+    def _load_audio(self, audio_path: str, sr: int = 22050):
+        """
+        Load mono float32 audio at the given sample rate
+        
+        The input here is always the WAV written above, so soundfile reads it
+        directly and soxr resamples only when the rate differs. Formats
+        soundfile cannot read fall back to librosa.load.
+        
+        Args:
+            audio_path: Path to audio file
+            sr: Target sample rate
+            
+        Returns:
+            (samples, sample_rate)
+        """
+        try:
+            import soundfile as sf
+            y, file_sr = sf.read(audio_path, dtype='float32', always_2d=False)
+        except Exception:
+            import librosa
+            return librosa.load(audio_path, sr=sr)
+        
+        if y.ndim == 2:
+            y = y.mean(axis=1)
+        if file_sr != sr:
+            try:
+                import soxr
+                y = soxr.resample(y, file_sr, sr).astype(np.float32, copy=False)
+            except ImportError:
+                import librosa
+                y = librosa.resample(y, orig_sr=file_sr, target_sr=sr)
+        return y, sr
+    
+    def _extract_audio_features(self, audio_path: str, audio: Optional[Tuple[np.ndarray, int]] = None) -> Dict:
+        """
+        Compute onsets and RMS energy for the enhancement pass
+        
+        Args:
+            audio_path: Path to audio file
+            audio: (samples, sample_rate) already in memory; read from audio_path if None
+            
+        Returns:
+            Dict with onset times, energy and frame times (None on failure)
+        """
+        try:
+            # Load audio, unless the conversion step already decoded it
+            y, sr = audio if audio is not None else self._load_audio(audio_path)
+            
+            # Detect onsets (sound starts)
+            hop_length = 512
+            onset_frames = _onset_detect(y, sr, hop_length=hop_length)
+            
+            # Calculate energy
+            energy = _frame_rms(y, hop_length=hop_length)
+            times = np.arange(len(energy)) * hop_length / float(sr)
+            
+            return {'onsets': onset_frames, 'energy': energy, 'times': times}
+            
+        except Exception as e:
+            logger.warning("⚠️ Audio feature extraction failed: %s", e)
             return None
     
     def _enhance_with_audio_features(
         self,
         alignment_data: Dict,
-        audio_path: str
+        audio_path: str,
+        features: Dict = None
     ) -> Dict:
         """
         Enhance Rhubarb's audio analysis with additional features
@@ -129,98 +321,206 @@ class TrueAudioLipMapping:
         Args:
             alignment_data: Rhubarb's audio-only analysis
             audio_path: Path to audio file
+            features: Output of _extract_audio_features (computed if None)
             
         Returns:
             Enhanced alignment data
         """
         try:
-            print(f"🔬 Enhancing with audio features...")
+            # Nothing to refine; skip loading the audio
+            if not alignment_data['mouthCues']:
+                return alignment_data
             
-            # Load audio
-            y, sr = librosa.load(audio_path, sr=22050)
-            
-            # Detect onsets (sound starts)
-            onset_frames = librosa.onset.onset_detect(
-                y=y,
-                sr=sr,
-                units='time',
-                backtrack=True
-            )
+            logger.debug("🔬 Enhancing with audio features...")
             
-            # Calculate energy
-            hop_length = 512
-            energy = librosa.feature.rms(y=y, hop_length=hop_length)[0]
-            times = librosa.frames_to_time(np.arange(len(energy)), sr=sr, hop_length=hop_length)
+            if features is None:
+                features = self._extract_audio_features(audio_path)
+            onset_frames = features['onsets']
+            energy = features['energy']
+            times = features['times']
             
             # Energy threshold for silence
             energy_threshold = np.mean(energy) * 0.2
             
-            enhanced_cues = []
+            cues = alignment_data['mouthCues']
+            starts = np.array([cue['start'] for cue in cues], dtype=np.float64)
+            ends = np.array([cue['end'] for cue in cues], dtype=np.float64)
             
-            for i, cue in enumerate(alignment_data['mouthCues']):
-                start_time = cue['start']
-                end_time = cue['end']
-                mouth_shape = cue['value']
-                
-                # Check for onset
-                has_onset = any(abs(onset - start_time) < 0.08 for onset in onset_frames)
-                
-                # Get energy during this cue
-                cue_energy_mask = (times >= start_time) & (times <= end_time)
-                if cue_energy_mask.any():
-                    avg_energy = np.mean(energy[cue_energy_mask])
-                    max_energy = np.max(energy[cue_energy_mask])
-                    is_silence = avg_energy < energy_threshold
-                else:
-                    avg_energy = 0.0
-                    max_energy = 0.0
-                    is_silence = True
-                
-                # Refine mouth shape based on energy
-                if is_silence:
-                    # Force closed mouth during silence
-                    mouth_shape = 'X'
-                elif has_onset and mouth_shape == 'X':
-                    # Open mouth at sound start
-                    mouth_shape = 'A'
-                elif max_energy > 0.3 and mouth_shape in ['A', 'X']:
-                    # Wider opening for loud sounds
-                    mouth_shape = 'D'
-                
-                enhanced_cues.append({
-                    'start': start_time,
-                    'end': end_time,
-                    'value': mouth_shape,
-                    'has_onset': has_onset,
-                    'energy': float(avg_energy),
-                    'is_silence': is_silence
-                })
+            # Check for onset: nearest onset on either side of each cue start
+            onsets = np.sort(np.asarray(onset_frames, dtype=np.float64))
+            has_onset = np.zeros(len(cues), dtype=bool)
+            if len(onsets):
+                idx = np.searchsorted(onsets, starts)
+                before = np.abs(onsets[np.maximum(idx - 1, 0)] - starts)
+                after = np.abs(onsets[np.minimum(idx, len(onsets) - 1)] - starts)
+                has_onset = np.minimum(before, after) < 0.08
+            
+            # Get energy during each cue: frames with start <= time <= end
+            i0 = np.searchsorted(times, starts, side='left')
+            i1 = np.searchsorted(times, ends, side='right')
+            counts = np.maximum(i1 - i0, 0)
+            has_frames = counts > 0
+            
+            cumulative = np.concatenate(([0.0], np.cumsum(energy, dtype=np.float64)))
+            avg_energy = np.where(has_frames, (cumulative[i1] - cumulative[np.minimum(i0, i1)]) / np.maximum(counts, 1), 0.0)
+            
+            # reduceat over (start, end) index pairs; a sentinel keeps end indices in range
+            padded = np.append(energy, 0.0)
+            bounds = np.stack([np.minimum(i0, len(energy)), i1], axis=1).ravel()
+            max_energy = np.where(has_frames, np.maximum.reduceat(padded, bounds)[::2], 0.0) if len(cues) else np.zeros(0)
+            
+            is_silence = ~has_frames | (avg_energy < energy_threshold)
+            
+            # Refine mouth shapes based on energy, first matching rule wins
+            values = np.array([cue['value'] for cue in cues], dtype=object)
+            values = np.select(
+                [
+                    is_silence,                                                  # Force closed mouth during silence
+                    has_onset & (values == 'X'),                                 # Open mouth at sound start
+                    (max_energy > 0.3) & ((values == 'A') | (values == 'X')),    # Wider opening for loud sounds
+                ],
+                ['X', 'A', 'D'],
+                default=values
+            )
+            
+            # Columns stay arrays until here; dicts are only built for the output
+            enhanced_cues = [
+                {
+                    'start': cue['start'],
+                    'end': cue['end'],
+                    'value': value,
+                    'has_onset': onset,
+                    'energy': avg,
+                    'is_silence': silent
+                }
+                for cue, value, onset, avg, silent in zip(
+                    cues, values.tolist(), has_onset.tolist(), avg_energy.tolist(), is_silence.tolist()
+                )
+            ]
             
             alignment_data['mouthCues'] = enhanced_cues
             
-            print(f"✅ Enhanced {len(enhanced_cues)} mouth cues")
+            logger.debug("✅ Enhanced %d mouth cues", len(enhanced_cues))
             
             return alignment_data
             
         except Exception as e:
-            print(f"⚠️ Enhancement failed: {e}, using original")
+            logger.warning("⚠️ Enhancement failed: %s, using original", e)
             return alignment_data
 
 
+def _frame(y: np.ndarray, frame_length: int, hop_length: int) -> np.ndarray:
+    """Zero-pad y by half a frame on each side and view it as (n_frames, frame_length)"""
+    y = np.pad(y, frame_length // 2)
+    return np.lib.stride_tricks.sliding_window_view(y, frame_length)[::hop_length]
+
+
+def _frame_rms(y: np.ndarray, frame_length: int = 2048, hop_length: int = 512) -> np.ndarray:
+    """RMS energy per centred frame, as librosa.feature.rms(y=y)[0]"""
+    return np.sqrt(np.mean(np.square(_frame(y, frame_length, hop_length), dtype=np.float32), axis=-1))
+
+
+@lru_cache(maxsize=8)
+def _mel_filterbank(sr: int, n_fft: int, n_mels: int = 128) -> np.ndarray:
+    """Slaney-style mel filterbank, as librosa.filters.mel with default arguments"""
+    f_sp = 200.0 / 3
+    min_log_mel = 1000.0 / f_sp
+    logstep = np.log(6.4) / 27.0
+    
+    max_hz = float(sr) / 2
+    max_mel = max_hz / f_sp if max_hz < 1000.0 else min_log_mel + np.log(max_hz / 1000.0) / logstep
+    mels = np.linspace(0.0, max_mel, n_mels + 2)
+    mel_f = f_sp * mels
+    log_t = mels >= min_log_mel
+    mel_f[log_t] = 1000.0 * np.exp(logstep * (mels[log_t] - min_log_mel))
+    
+    fdiff = np.diff(mel_f)
+    ramps = np.subtract.outer(mel_f, np.fft.rfftfreq(n=n_fft, d=1.0 / sr))
+    weights = np.zeros((n_mels, 1 + n_fft // 2), dtype=np.float32)
+    for i in range(n_mels):
+        weights[i] = np.maximum(0, np.minimum(-ramps[i] / fdiff[i], ramps[i + 2] / fdiff[i + 1]))
+    weights *= (2.0 / (mel_f[2:n_mels + 2] - mel_f[:n_mels]))[:, np.newaxis]
+    return weights
+
+
+def _onset_detect(y: np.ndarray, sr: int, hop_length: int = 512, n_fft: int = 2048) -> np.ndarray:
+    """
+    Onset times in seconds, as librosa.onset.onset_detect(units='time', backtrack=True)
+    
+    Same pipeline as librosa's defaults (log-mel spectral flux, peak picking
+    with 30ms/100ms windows, backtracking to the preceding energy minimum)
+    written against NumPy and scipy.ndimage, so loading this module does not
+    pull in librosa and its numba warm-up.
+    """
+    from scipy.fft import rfft
+    from scipy.ndimage import maximum_filter1d, uniform_filter1d
+    from scipy.signal import get_window
+    
+    # Log-mel power spectrogram, (n_mels, n_frames), in single precision
+    window = get_window('hann', n_fft, fftbins=True).astype(np.float32)
+    spectrum = rfft(window * _frame(np.asarray(y, dtype=np.float32), n_fft, hop_length), axis=-1)
+    power = np.abs(spectrum) ** 2
+    mel = np.dot(_mel_filterbank(sr, n_fft), power.T)
+    log_mel = 10.0 * np.log10(np.maximum(1e-10, mel))
+    log_mel = np.maximum(log_mel, log_mel.max() - 80.0)
+    
+    # Spectral flux, shifted to compensate for the lag and frame centring
+    flux = np.mean(np.maximum(0.0, log_mel[:, 1:] - log_mel[:, :-1]), axis=0)
+    envelope = np.pad(flux, (1 + n_fft // (2 * hop_length), 0))[:log_mel.shape[1]]
+    envelope = envelope - np.min(envelope)
+    envelope /= np.max(envelope) + np.finfo(envelope.dtype).tiny
+    if not envelope.any() or not np.all(np.isfinite(envelope)):
+        return np.array([], dtype=float)
+    
+    # Peak picking: local maximum over 30ms that clears the 100ms mean by delta
+    pre_max = int(np.ceil(0.03 * sr // hop_length))
+    post_max = int(np.ceil(0.00 * sr // hop_length + 1))
+    pre_avg = int(np.ceil(0.10 * sr // hop_length))
+    post_avg = int(np.ceil(0.10 * sr // hop_length + 1))
+    wait = int(np.ceil(0.03 * sr // hop_length))
+    
+    mov_max = maximum_filter1d(envelope, pre_max + post_max, mode='constant',
+                               origin=int(np.ceil(0.5 * (pre_max - post_max))), cval=envelope.min())
+    mov_avg = uniform_filter1d(envelope, pre_avg + post_avg, mode='nearest',
+                               origin=int(np.ceil(0.5 * (pre_avg - post_avg))))
+    n = len(envelope)
+    for i in list(range(min(pre_avg, n))) + list(range(max(n - post_avg, 0), n)):
+        mov_avg[i] = np.mean(envelope[max(i - pre_avg, 0):i + post_avg])
+    
+    detections = envelope * (envelope == mov_max)
+    detections = detections * (detections >= mov_avg + 0.07)
+    peaks = []
+    for i in np.flatnonzero(detections):
+        if not peaks or i > peaks[-1] + wait:
+            peaks.append(i)
+    
+    # Backtrack each onset to the nearest preceding local minimum of the envelope
+    minima = np.flatnonzero((envelope[1:-1] <= envelope[:-2]) & (envelope[1:-1] < envelope[2:]))
+    minima = np.unique(np.concatenate(([0], 1 + minima)))
+    onsets = minima[np.searchsorted(minima, np.array(peaks, dtype=int), side='right') - 1]
+    
+    return onsets * hop_length / float(sr)
+
+
 # Singleton
 _true_mapper_instance = None
+_true_mapper_lock = threading.Lock()
 
 def get_true_audio_lip_mapper():
-    """Get singleton instance"""
+    """Get singleton instance (safe to call from concurrent requests)"""
     global _true_mapper_instance
     if _true_mapper_instance is None:
-        _true_mapper_instance = TrueAudioLipMapping()
+        with _true_mapper_lock:
+            if _true_mapper_instance is None:
+                _true_mapper_instance = TrueAudioLipMapping()
     return _true_mapper_instance
 
 
 if __name__ == '__main__':
     import sys
     
+    logging.basicConfig(level=logging.DEBUG, format='%(message)s')
+    
     if len(sys.argv) >= 2:
         mapper = TrueAudioLipMapping()
         audio_path = sys.argv[1]
@@ -11,7 +11,7 @@ from pathlib import Path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import pymysql
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, insert, text
 from database.config import DB_CONFIG
 from database.connection import Base, engine, test_connection, init_db
 from database.models import (
@@ -143,7 +143,7 @@ def insert_sample_data():
         
         # Create sample exercises
         exercises = [
-            SentenceExercise(
+            dict(
                 sentence_id=f"sent_{uuid.uuid4().hex[:8]}",
                 text_en="The cat is on the mat",
                 text_hi="बिल्ली चटाई पर है",
@@ -152,7 +152,7 @@ def insert_sample_data():
                 category="animals",
                 is_active=True
             ),
-            SentenceExercise(
+            dict(
                 sentence_id=f"sent_{uuid.uuid4().hex[:8]}",
                 text_en="I want to drink water",
                 text_hi="मुझे पानी पीना है",
@@ -161,7 +161,7 @@ def insert_sample_data():
                 category="daily_needs",
                 is_active=True
             ),
-            SentenceExercise(
+            dict(
                 sentence_id=f"sent_{uuid.uuid4().hex[:8]}",
                 text_en="Good morning, how are you?",
                 text_hi="सुप्रभात, आप कैसे हैं?",
@@ -172,12 +172,9 @@ def insert_sample_data():
             )
         ]
         
-        for exercise in exercises:
-            db.add(exercise)
-        
         # Create sample picture exercises
         pictures = [
-            PictureExercise(
+            dict(
                 picture_id=f"pic_{uuid.uuid4().hex[:8]}",
                 picture_name="Apple",
                 picture_url="/images/apple.jpg",
@@ -188,7 +185,7 @@ def insert_sample_data():
                 category="fruits",
                 is_active=True
             ),
-            PictureExercise(
+            dict(
                 picture_id=f"pic_{uuid.uuid4().hex[:8]}",
                 picture_name="Water",
                 picture_url="/images/water.jpg",
@@ -201,12 +198,9 @@ def insert_sample_data():
             )
         ]
         
-        for picture in pictures:
-            db.add(picture)
-        
         # Create sample lip animation exercises
         lip_exercises = [
-            LipAnimationExercise(
+            dict(
                 exercise_id=f"lip_{uuid.uuid4().hex[:8]}",
                 word_en="hello",
                 word_hi="नमस्ते",
@@ -215,7 +209,7 @@ def insert_sample_data():
                 category="greetings",
                 is_active=True
             ),
-            LipAnimationExercise(
+            dict(
                 exercise_id=f"lip_{uuid.uuid4().hex[:8]}",
                 word_en="water",
                 word_hi="पानी",
@@ -226,8 +220,11 @@ def insert_sample_data():
             )
         ]
         
-        for lip_ex in lip_exercises:
-            db.add(lip_ex)
+        # Static seed rows: one Core executemany per table, no ORM
+        # instance tracking
+        db.execute(insert(SentenceExercise.__table__), exercises)
+        db.execute(insert(PictureExercise.__table__), pictures)
+        db.execute(insert(LipAnimationExercise.__table__), lip_exercises)
         
         db.commit()
         print(f"✅ Sample data inserted successfully")